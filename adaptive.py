@@ -0,0 +1,127 @@
+# Information:
+# Adaptive questionnaire: instead of asking every student all the questions of 'scoring.py' in a fixed order, the next
+# question is the one with the highest expected information gain over the five educations, and the questions stop as soon
+# as one education is likely enough. A student with a clear study preference is done after one or two questions.
+#
+# The weights of the scoring engine are read as log-likelihoods: the chance of an answer, given an education, is the
+# softmax of the weights of all the answers of that question (divided by 'ADAPTIVE_TEMPERATURE'). The posterior over the
+# educations after some answers is then the normalized product of those chances. The expected gain of every open question
+# is computed at once, with NumPy over the whole question bank (one row per answer option):
+#   gain(question) = H(posterior) - sum over its answers of P(answer) * H(posterior after that answer)
+#
+# The questions only depend on the previous answers, so the whole policy is a small tree that's computed once on start-up
+# and sent to the browser ('policy'): the browser picks the next page by itself, without asking the server.
+#
+# Average number of questions of simulated students (answers drawn from the model):
+#   python3 adaptive.py
+
+import os
+
+import numpy as np
+
+from scoring import questions
+
+ADAPTIVE_CONFIDENCE = float(os.environ.get("ADAPTIVE_CONFIDENCE", 0.9))  # Stop when one education has this probability.
+ADAPTIVE_TEMPERATURE = 8.0  # Points of the weights per unit of log-likelihood, higher makes every answer count less.
+MINIMAL_GAIN = 1e-3  # Bits, a question that tells less than this isn't worth asking.
+
+
+def entropy(probabilities):
+    # In bits, along the last axis.
+    logarithms = np.log2(np.where(probabilities > 0, probabilities, 1.0))
+    return -np.sum(probabilities * logarithms, axis=-1)
+
+
+class AdaptiveQuestionnaire:
+    def __init__(self, engine, confidence=ADAPTIVE_CONFIDENCE, temperature=ADAPTIVE_TEMPERATURE):
+        self.engine = engine
+        self.confidence = confidence
+        self.keys = [key for key, options in questions]
+        self.starts = np.array([engine.offsets[key] for key in self.keys])
+
+        # P(answer | education), shape: (features, educations), every block of one question sums to 1 per education.
+        logits = engine.weights / temperature
+        self.likelihoods = np.empty_like(logits)
+        for key, options in questions:
+            block = slice(engine.offsets[key], engine.offsets[key] + len(options))
+            exponents = np.exp(logits[block] - logits[block].max(axis=0))
+            self.likelihoods[block] = exponents / exponents.sum(axis=0)
+        self.log_likelihoods = np.log(self.likelihoods)
+        self.prior = np.full(engine.weights.shape[1], 1.0 / engine.weights.shape[1])
+        self._policy = None
+
+    def posterior(self, answers):
+        log_posterior = np.log(self.prior) + self.engine.encode(answers) @ self.log_likelihoods
+        probabilities = np.exp(log_posterior - log_posterior.max())
+        return probabilities / probabilities.sum()
+
+    def information_gain(self, posterior, asked=()):
+        # Expected gain (bits) of every question of 'questions', -inf for the questions that are already answered.
+        joint = self.likelihoods * posterior  # (features, educations): P(answer and education).
+        answer_probabilities = joint.sum(axis=1)
+        after = joint / answer_probabilities[:, np.newaxis]  # Posterior after every possible answer.
+        expected = np.add.reduceat(answer_probabilities * entropy(after), self.starts)
+        gain = entropy(posterior) - expected
+        gain[[self.keys.index(key) for key in asked]] = -np.inf
+        return gain
+
+    def choose(self, posterior, asked):
+        # Next question (session key), or None when the posterior is confident or no question tells enough.
+        if posterior.max() >= self.confidence or len(asked) == len(self.keys):
+            return None
+        gain = self.information_gain(posterior, asked)
+        best = int(np.argmax(gain))
+        return self.keys[best] if gain[best] >= MINIMAL_GAIN else None
+
+    def next_question(self, answers):
+        # The previous answers follow the policy, so the tree is walked instead of computing the gains again.
+        node = self.policy()
+        while node and answers.get(node["ask"]) in node["then"]:
+            node = node["then"][answers[node["ask"]]]
+        return node["ask"] if node else None
+
+    def policy(self):
+        # Tree of the questions: {"ask": session key, "then": {answer: tree}}, an empty dict when the questions are done.
+        if self._policy is None:
+            self._policy = self.build_policy(self.prior, ())
+        return self._policy
+
+    def build_policy(self, posterior, asked):
+        key = self.choose(posterior, asked)
+        if key is None:
+            return {}
+        options = dict(questions)[key]
+        offset = self.engine.offsets[key]
+        then = {}
+        for index, option in enumerate(options):
+            after = self.likelihoods[offset + index] * posterior
+            then[option] = self.build_policy(after / after.sum(), asked + (key,))
+        return {"ask": key, "then": then}
+
+
+def simulate(questionnaire, students=10000, seed=1):
+    # Number of questions per student, for students whose answers are drawn from the model.
+    rng = np.random.default_rng(seed)
+    options = dict(questions)
+    counts = []
+    for education in rng.integers(0, len(questionnaire.prior), students):
+        node, asked = questionnaire.policy(), 0
+        while node:
+            key = node["ask"]
+            offset = questionnaire.engine.offsets[key]
+            chances = questionnaire.likelihoods[offset:offset + len(options[key]), education]
+            node = node["then"][options[key][rng.choice(len(chances), p=chances)]]
+            asked += 1
+        counts.append(asked)
+    return np.bincount(counts, minlength=len(questions) + 1)
+
+
+if __name__ == "__main__":
+    from scoring import create_scoring_engine
+
+    counts = simulate(AdaptiveQuestionnaire(create_scoring_engine()))
+    print("Questions per student (fixed sequence: {}):".format(len(questions)))
+    for asked, students in enumerate(counts):
+        if students:
+            print("  {}: {:5.1f}%".format(asked, 100 * students / counts.sum()))
+    print("Average: {:.2f}".format(np.dot(np.arange(len(counts)), counts) / counts.sum()))
@@ -0,0 +1,166 @@
+# Information:
+# Live numbers for the staff dashboard ('/staff'), based on the funnel events of the students (see 'events.py'):
+# * the studies the students choose, per prior education (HAVO/VWO/MBO),
+# * how many students reach every page (the drop-off per page),
+# * the pass rate of the small coding projects.
+# The numbers are maintained incrementally: one background thread per worker reads only the events written since its last
+# read and updates the counters. Every staff screen receives the numbers through server-sent events ('/staff/stream'), so
+# fifty screens don't poll the server or count the events again.
+# The last choices and the pages of every student are only kept while their session lives ('SESSION_TTL' of
+# 'session_store.py', measured in event time), the counters keep the students whose session has ended.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import flask
+
+from events import EVENTS_DB, connect, read_events
+from session_store import SESSION_TTL
+
+ANALYTICS_INTERVAL = float(os.environ.get("ANALYTICS_INTERVAL", 2))  # Seconds between two reads of new events.
+STREAM_SECONDS = 300  # A stream is closed after this time (the browser reconnects), so a worker can stop gracefully.
+KEEPALIVE_SECONDS = 15
+
+# The pages of the funnel, in order ('/page-6' ... '/page-8' are part of the marble game on '/page-5').
+funnel_pages = ["/"] + ["/page-{}".format(number) for number in range(1, 21) if number not in (6, 7, 8)]
+
+
+class FunnelAggregates:
+    def __init__(self, session_ttl=SESSION_TTL):
+        self.session_ttl = session_ttl
+        self.last_id = 0  # Last event that's counted.
+        self.last_seen = OrderedDict()  # Session id -> time of its last event, the least recent first.
+        self.students = 0  # Students that have seen a page of the funnel.
+        self.choices = {}  # Session id -> {"high_school": ..., "study": ...}, the last choices of every student.
+        self.studies = Counter()  # (high school, study) -> students.
+        self.pages_seen = {}  # Session id -> pages the student has seen.
+        self.reached = Counter()  # Page -> students that reached it.
+        self.attempts = Counter()  # Project -> programs that were checked.
+        self.passed = Counter()  # Project -> programs that passed.
+
+    def apply(self, session_id, kind, value):
+        match kind:
+            case "high_school" | "study" if value is not None:
+                choice = self.choices.setdefault(session_id, {"high_school": None, "study": None})
+                if choice["study"] is not None:
+                    self.studies[(choice["high_school"], choice["study"])] -= 1
+                choice[kind] = value
+                if choice["study"] is not None:
+                    self.studies[(choice["high_school"], choice["study"])] += 1
+            case "page_view" if value in funnel_pages:
+                pages = self.pages_seen.setdefault(session_id, set())
+                if not pages:
+                    self.students += 1
+                if value not in pages:
+                    pages.add(value)
+                    self.reached[value] += 1
+            case "code_result":
+                self.attempts[value["project"]] += 1
+                self.passed[value["project"]] += value["passed"]
+
+    def update(self, connection, limit=10000):
+        # Counts the new events, returns True when there were any.
+        events = read_events(connection, self.last_id, limit)
+        for event_id, timestamp, session_id, kind, value in events:
+            self.apply(session_id, kind, value)
+            self.last_seen.pop(session_id, None)
+            self.last_seen[session_id] = timestamp
+            self.last_id = event_id
+        if events:
+            self.expire(events[-1][1] - self.session_ttl)
+        if len(events) == limit:
+            self.update(connection, limit)  # More events are waiting (for instance the first read after a restart).
+        return bool(events)
+
+    def expire(self, before):
+        # Forgets the sessions without events since 'before', their session (and so their answers) has ended as well.
+        while self.last_seen:
+            session_id, timestamp = next(iter(self.last_seen.items()))
+            if timestamp >= before:
+                break
+            del self.last_seen[session_id]
+            self.choices.pop(session_id, None)
+            self.pages_seen.pop(session_id, None)
+
+    def summary(self):
+        return {
+            "students": self.students,
+            "studies": [
+                {"high_school": high_school, "study": study, "students": count}
+                for (high_school, study), count in sorted(self.studies.items(), key=lambda item: str(item[0])) if count > 0
+            ],
+            "pages": [{"page": page, "students": self.reached[page]} for page in funnel_pages],
+            "projects": [
+                {"project": project, "attempts": attempts, "passed": self.passed[project],
+                 "pass_rate": self.passed[project] / attempts}
+                for project, attempts in sorted(self.attempts.items())
+            ],
+            "last_event": self.last_id,
+        }
+
+
+class AnalyticsFeed:
+    # One set of aggregates per process, shared by every staff screen that's connected to this worker.
+
+    def __init__(self, path=EVENTS_DB, interval=ANALYTICS_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.aggregates = FunnelAggregates()
+        self.message = None  # Latest summary, serialized once for all the screens.
+        self.version = 0
+        self._changed = threading.Condition()
+        self._reader_pid = None
+
+    def start_reader(self):
+        # One thread per process, started by the first staff screen (see 'serve.py' for the worker processes).
+        with self._changed:
+            if self._reader_pid == os.getpid():
+                return
+            self._reader_pid = os.getpid()
+            self.refresh(connect(self.path))
+        threading.Thread(target=self.read_forever, name="analytics-reader", daemon=True).start()
+
+    def refresh(self, connection):
+        if self.aggregates.update(connection) or self.message is None:
+            with self._changed:
+                self.message = json.dumps(self.aggregates.summary())
+                self.version += 1
+                self._changed.notify_all()
+
+    def read_forever(self):
+        connection = connect(self.path)
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh(connection)
+            except sqlite3.Error:
+                pass  # The database is busy, try again next time.
+
+    def wait_for_change(self, version, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.message
+
+    def stream(self):
+        # Server-sent events: the current numbers first, then every change.
+        self.start_reader()
+        started = time.monotonic()
+        version = None
+        yield "retry: 2000\n\n"
+        while time.monotonic() - started < STREAM_SECONDS:
+            new_version, message = self.wait_for_change(version, KEEPALIVE_SECONDS)
+            if new_version == version:
+                yield ": keepalive\n\n"  # Keeps proxies from closing an idle connection.
+            else:
+                version = new_version
+                yield "data: {}\n\n".format(message)
+
+    def install(self, server, path="/staff/stream"):
+        @server.route(path)
+        def stream_analytics():
+            return flask.Response(self.stream(), mimetype="text/event-stream",
+                                  headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
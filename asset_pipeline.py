@@ -0,0 +1,115 @@
+# Information:
+# Build step for the images within 'assets/'. The pages show these pictures at a fixed size (700x400), but the
+# original PNG files are a lot larger. This step generates resized WebP and PNG variants at the display resolution, with a
+# content hash in their filename, so they can be cached by the browser forever.
+#
+# Build the variants (needs 'Pillow'), run from the root of the repository:
+#   python3 asset_pipeline.py
+# The application then uses the optimized variants automatically (see 'install'), as long as 'assets/optimized/manifest.json'
+# exists. Otherwise the original images are used.
+
+import hashlib
+import io
+import json
+import os
+
+import flask
+
+ASSETS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+OPTIMIZED_FOLDER = "optimized"  # Within the assets folder.
+MANIFEST_NAME = "manifest.json"
+ASSET_FORMAT = os.environ.get("ASSET_FORMAT", "webp")  # 'webp' (smallest) or 'png'.
+OPTIMIZED_ASSETS = os.environ.get("OPTIMIZED_ASSETS", "1") == "1"
+
+# Size (width, height) at which every image is shown on the pages.
+display_sizes = {
+    "PROJECT_EEE.png": (700, 400),
+    "PROJECT_MT.png": (700, 400),
+    "PROJECT_IPO.png": (700, 400),
+}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# -------- BUILD -------- #
+
+
+def encode_image(image, image_format):
+    output = io.BytesIO()
+    if image_format == "webp":
+        image.save(output, format="WEBP", quality=85, method=6)
+    else:
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def build(assets_folder=ASSETS_FOLDER, scale=1):
+    from PIL import Image  # Only needed for the build step.
+
+    output_folder = os.path.join(assets_folder, OPTIMIZED_FOLDER)
+    os.makedirs(output_folder, exist_ok=True)
+
+    manifest = {}
+    for name, (width, height) in display_sizes.items():
+        with Image.open(os.path.join(assets_folder, name)) as image:
+            # The pages stretch the picture to this size anyway, so resizing to exactly this size looks the same.
+            resized = image.convert("RGB").resize((width * scale, height * scale), Image.LANCZOS)
+
+        stem = os.path.splitext(name)[0]
+        manifest[name] = {}
+        for image_format in ("webp", "png"):
+            data = encode_image(resized, image_format)
+            filename = "{}.{}.{}".format(stem, hashlib.sha256(data).hexdigest()[:12], image_format)
+            with open(os.path.join(output_folder, filename), "wb") as image_file:
+                image_file.write(data)
+            manifest[name][image_format] = "{}/{}".format(OPTIMIZED_FOLDER, filename)
+
+    # Remove the variants of older builds.
+    current = {os.path.basename(path) for variants in manifest.values() for path in variants.values()}
+    for filename in os.listdir(output_folder):
+        if filename != MANIFEST_NAME and filename not in current:
+            os.remove(os.path.join(output_folder, filename))
+
+    with open(os.path.join(output_folder, MANIFEST_NAME), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+# -------- SERVING -------- #
+
+
+def load_manifest(assets_folder=ASSETS_FOLDER):
+    try:
+        with open(os.path.join(assets_folder, OPTIMIZED_FOLDER, MANIFEST_NAME), encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def install(app, image_format=ASSET_FORMAT):
+    # Let 'app.get_asset_url' return the optimized variant, and serve those variants with a long-lived Cache-Control header.
+    manifest = load_manifest() if OPTIMIZED_ASSETS else {}
+    original_get_asset_url = app.get_asset_url
+
+    def get_asset_url(path):
+        return original_get_asset_url(manifest.get(path, {}).get(image_format, path))
+
+    app.get_asset_url = get_asset_url
+
+    optimized_prefix = "{}{}/{}/".format(app.config.requests_pathname_prefix, app.config.assets_url_path.strip("/"), OPTIMIZED_FOLDER)
+
+    @app.server.after_request
+    def cache_optimized_assets(response):
+        # The filename changes with the content, so the browser never has to ask again.
+        if response.status_code == 200 and flask.request.path.startswith(optimized_prefix):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    return manifest
+
+
+if __name__ == "__main__":
+    for original, variants in build().items():
+        original_size = os.path.getsize(os.path.join(ASSETS_FOLDER, original))
+        sizes = ", ".join("{} {} kB".format(image_format, os.path.getsize(os.path.join(ASSETS_FOLDER, path)) // 1024)
+                          for image_format, path in variants.items())
+        print("{:<28} {:>6} kB -> {}".format(original, original_size // 1024, sizes))
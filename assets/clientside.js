@@ -0,0 +1,428 @@
+// Clientside callbacks of the StudyCheckinator 900, these run within the browser (no request to the server).
+
+var INTRODUCTION_CODING = "Let's go coding! Enter your code within this little IDE (Integrated Developers Environment, a tool that programmers always use).";
+var CHECKING_CODE = "Checking your program... ⏳";
+
+function check_code(n_clicks, value) {
+    // Every program goes to the server, which compiles and runs it (or compares strings without a sandbox).
+    if (!n_clicks) {
+        return [INTRODUCTION_CODING, window.dash_clientside.no_update];
+    }
+    return [CHECKING_CODE, {source: value || "", n_clicks: n_clicks}];
+}
+
+// Names within the staff dashboard, for the values of the dropdowns.
+var HIGH_SCHOOL_NAMES = {HAVO_SAX: "HAVO", VWO_SAX: "VWO", MBO_SAX: "MBO"};
+var STUDY_NAMES = {
+    ACS_SAX: "Applied Computer Science",
+    EEE_SAX: "Electrical Electronic Engineering",
+    MT_SAX: "Mechatronics",
+    ICT_SAX: "Software Engineering",
+    IPO_SAX: "Industrial Product Design",
+    NONE_SAX: "No preference",
+};
+var PROJECT_NAMES = {cpp: "C++ (Applied Computer Science)", python: "Python (Software Engineering)"};
+
+var staff_stream = null;  // The open connection of the staff dashboard, there is only one per browser tab.
+
+function component(type, children) {
+    return {namespace: "dash_html_components", type: type, props: {children: children}};
+}
+
+function table(header, rows) {
+    return component("Table", [
+        component("Thead", component("Tr", header.map(function (cell) { return component("Th", cell); }))),
+        component("Tbody", rows.map(function (row) {
+            return component("Tr", row.map(function (cell) { return component("Td", String(cell)); }));
+        })),
+    ]);
+}
+
+function percentage(part, total) {
+    return total ? Math.round(100 * part / total) + "%" : "-";
+}
+
+// Adaptive questionnaire (see 'adaptive.py'): the policy tree of the questions is walked along the answers so far, the
+// next page is the page of the next question, or the result when the questions are done.
+function is_marble_question(key) {
+    return typeof key === "string" && key.indexOf("marble_") === 0;
+}
+
+function policy_node(policy, answers) {
+    var node = policy.tree;
+    while (node.ask && answers[node.ask] != null && node.then[answers[node.ask]]) {
+        node = node.then[answers[node.ask]];
+    }
+    return node;
+}
+
+// The question of every input, the same pairs as the widgets within 'main.py'.
+var ANSWER_KEYS = {
+    initial_high_school_filter: "initial_high_school_choice",
+    initial_study_filter: "initial_study_choice",
+    initial_interest_filter: "initial_interest_choice",
+};
+
+function next_page(policy, answers) {
+    var key = policy_node(policy, answers).ask;
+    if (!key) {
+        return policy.result;
+    }
+    if (is_marble_question(key) && Object.keys(answers).some(is_marble_question)) {
+        return policy.game;  // The game is already explained.
+    }
+    return policy.pages[key];
+}
+
+// Marble game (page 5): the marble falls down the board, the student pushes it to the left or the right bin. Every bin is an
+// answer to the question above the board. The physics runs within the browser, only the answers are sent to the server
+// (together, after the last question, see 'submit_marble_answers' within 'main.py').
+var MARBLE_GRAVITY = 260;  // Pixels per second squared, slow enough to steer.
+var MARBLE_PUSH = 140;  // Pixels per second, added to the speed by one press on a button.
+var MARBLE_RADIUS = 14;
+var MARBLE_BOUNCE = 0.5;  // Speed that's kept after hitting a wall or a peg.
+var MARBLE_FRICTION = 0.6;  // Part of the horizontal speed that's lost per second.
+var MARBLE_BIN_HEIGHT = 100;
+
+function marble_pegs(width, height) {
+    var pegs = [];
+    [0.35, 0.55].forEach(function (row, index) {
+        [0.2, 0.4, 0.6, 0.8].forEach(function (column) {
+            pegs.push({x: width * (column + (index ? 0.05 : 0)), y: height * row, radius: 6});  // No peg in the middle.
+        });
+    });
+    return pegs;
+}
+
+function draw_marble_game(context, game) {
+    var width = game.canvas.width;
+    var height = game.canvas.height;
+    var question = game.question;
+
+    context.clearRect(0, 0, width, height);
+    context.fillStyle = "#f4f4f4";
+    context.fillRect(0, 0, width, height);
+
+    context.fillStyle = "#dfe9f5";
+    context.fillRect(0, height - MARBLE_BIN_HEIGHT, width / 2, MARBLE_BIN_HEIGHT);
+    context.fillStyle = "#f5e3df";
+    context.fillRect(width / 2, height - MARBLE_BIN_HEIGHT, width / 2, MARBLE_BIN_HEIGHT);
+    context.fillStyle = "#333333";
+    context.fillRect(width / 2 - 3, height - MARBLE_BIN_HEIGHT, 6, MARBLE_BIN_HEIGHT);
+
+    context.font = "bold 20px Lato, sans-serif";
+    context.textAlign = "center";
+    context.fillText(question.left[1], width / 4, height - 20);
+    context.fillText(question.right[1], 3 * width / 4, height - 20);
+
+    game.pegs.forEach(function (peg) {
+        context.beginPath();
+        context.arc(peg.x, peg.y, peg.radius, 0, 2 * Math.PI);
+        context.fill();
+    });
+
+    var gradient = context.createRadialGradient(game.x - 4, game.y - 4, 2, game.x, game.y, MARBLE_RADIUS);
+    gradient.addColorStop(0, "#ffffff");
+    gradient.addColorStop(1, "#00a79d");
+    context.fillStyle = gradient;
+    context.beginPath();
+    context.arc(game.x, game.y, MARBLE_RADIUS, 0, 2 * Math.PI);
+    context.fill();
+}
+
+function step_marble_game(game, seconds) {
+    var width = game.canvas.width;
+    var height = game.canvas.height;
+
+    game.vy += MARBLE_GRAVITY * seconds;
+    game.vx *= Math.max(1 - MARBLE_FRICTION * seconds, 0);
+    game.x += game.vx * seconds;
+    game.y += game.vy * seconds;
+
+    // Walls, and the wall between the two bins.
+    if (game.x < MARBLE_RADIUS || game.x > width - MARBLE_RADIUS) {
+        game.x = Math.min(Math.max(game.x, MARBLE_RADIUS), width - MARBLE_RADIUS);
+        game.vx = -game.vx * MARBLE_BOUNCE;
+    }
+    if (game.y > height - MARBLE_BIN_HEIGHT - MARBLE_RADIUS && Math.abs(game.x - width / 2) < MARBLE_RADIUS + 3) {
+        var side = game.x < width / 2 || (game.x === width / 2 && game.vx < 0) ? -1 : 1;
+        game.x = width / 2 + side * (MARBLE_RADIUS + 3);
+        game.vx = side * Math.max(Math.abs(game.vx) * MARBLE_BOUNCE, 20);
+    }
+
+    // Pegs: move the marble out of the peg, and reflect its speed.
+    game.pegs.forEach(function (peg) {
+        var dx = game.x - peg.x;
+        var dy = game.y - peg.y;
+        var distance = Math.sqrt(dx * dx + dy * dy);
+        var minimum = MARBLE_RADIUS + peg.radius;
+        if (distance > 0 && distance < minimum) {
+            var nx = dx / distance;
+            var ny = dy / distance;
+            var speed = game.vx * nx + game.vy * ny;
+            game.x = peg.x + nx * minimum;
+            game.y = peg.y + ny * minimum;
+            if (speed < 0) {
+                game.vx -= (1 + MARBLE_BOUNCE) * speed * nx;
+                game.vy -= (1 + MARBLE_BOUNCE) * speed * ny;
+            }
+        }
+    });
+
+    // Landed within a bin: that's the answer.
+    if (game.y >= height - MARBLE_RADIUS) {
+        var question = game.question;
+        game.answers[question.key] = game.x < width / 2 ? question.left[0] : question.right[0];
+        return true;
+    }
+    return false;
+}
+
+// The next question of the game: the next one of the list, or with the adaptive questionnaire the next marble question of
+// the policy (the game stops when the policy asks a question on another page, or nothing at all).
+function next_marble_question(game) {
+    if (game.node === null) {
+        return game.questions[game.index] || null;
+    }
+    if (game.index > 0) {
+        game.node = game.node.then[game.answers[game.question.key]] || {};
+    }
+    return game.questions.find(function (question) { return question.key === game.node.ask; }) || null;
+}
+
+function start_marble_round(game) {
+    game.x = game.canvas.width / 2;
+    game.y = MARBLE_RADIUS + 10;
+    game.vx = 0;
+    game.vy = 0;
+    game.dropped = false;  // The marble waits at the top until the first push.
+    window.dash_clientside.set_props("marble_question", {
+        children: "Question " + (game.index + 1) + (game.node === null ? " of " + game.questions.length : "") + ": " + game.question.question,
+    });
+}
+
+function start_marble_game(canvas, questions, policy, answers) {
+    var context = canvas.getContext("2d");
+    var game = {canvas: canvas, questions: questions, index: 0, answers: {}, pegs: marble_pegs(canvas.width, canvas.height)};
+    var node = policy ? policy_node(policy, answers || {}) : null;
+    game.node = node !== null && is_marble_question(node.ask) ? node : null;  // Otherwise all the questions, in order.
+    game.question = next_marble_question(game);
+    var previous = null;
+
+    function push(direction) {
+        game.dropped = true;
+        game.vx += direction * MARBLE_PUSH;
+    }
+    function on_key(event) {
+        if (event.key === "ArrowLeft" || event.key === "ArrowRight") {
+            push(event.key === "ArrowLeft" ? -1 : 1);
+            event.preventDefault();
+        }
+    }
+    document.getElementById("marble_left").onclick = function () { push(-1); };
+    document.getElementById("marble_right").onclick = function () { push(1); };
+    document.addEventListener("keydown", on_key);
+
+    function frame(time) {
+        if (!document.body.contains(canvas)) {
+            document.removeEventListener("keydown", on_key);  // The student left the page.
+            return;
+        }
+        var seconds = previous === null ? 0 : Math.min((time - previous) / 1000, 0.05);
+        previous = time;
+
+        if (game.dropped && step_marble_game(game, seconds)) {
+            game.index += 1;
+            game.question = next_marble_question(game);
+            if (game.question === null) {
+                document.removeEventListener("keydown", on_key);
+                window.dash_clientside.set_props("marble_question", {children: "Thanks for playing! Your result is calculated... ⏳"});
+                if (policy) {
+                    window.dash_clientside.set_props("adaptive_answers", {data: Object.assign({}, answers, game.answers)});
+                }
+                window.dash_clientside.set_props("marble_answers", {data: game.answers});  // One request for all the answers.
+                return;
+            }
+            start_marble_round(game);
+        }
+        draw_marble_game(context, game);
+        window.requestAnimationFrame(frame);
+    }
+
+    start_marble_round(game);
+    window.requestAnimationFrame(frame);
+}
+
+// -------- PAGE VIEWS -------- //
+
+// With client routing a page change doesn't reach the server, the pages that are shown are collected here and sent in
+// batches (see 'EventRecorder.install' within 'events.py').
+var PAGE_VIEW_BATCH = 10;  // Page views that are sent right away, 'PAGE_VIEW_BATCH' within 'events.py' is the maximum.
+var PAGE_VIEW_INTERVAL = 10000;  // Milliseconds a page view waits at most.
+
+var page_views = [];
+var page_views_url = null;
+var page_views_timer = null;
+
+function send_page_views() {
+    window.clearTimeout(page_views_timer);
+    page_views_timer = null;
+    if (!page_views.length || page_views_url === null) {
+        return;
+    }
+    var body = JSON.stringify({pages: page_views.splice(0, page_views.length)});
+    if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+        // The kiosk service worker queues the request without network, it doesn't see the beacons of every browser.
+        fetch(page_views_url, {method: "POST", headers: {"Content-Type": "application/json"}, body: body}).catch(function () {});
+    } else if (!navigator.sendBeacon || !navigator.sendBeacon(page_views_url, new Blob([body], {type: "application/json"}))) {
+        fetch(page_views_url, {method: "POST", headers: {"Content-Type": "application/json"}, body: body, keepalive: true}).catch(function () {});
+    }
+}
+
+function add_page_view(pathname) {
+    page_views.push(pathname);
+    if (page_views.length >= PAGE_VIEW_BATCH) {
+        send_page_views();
+    } else if (page_views_timer === null) {
+        page_views_timer = window.setTimeout(send_page_views, PAGE_VIEW_INTERVAL);
+    }
+}
+
+// The last page views of a student who closes the tab.
+document.addEventListener("visibilitychange", function () {
+    if (document.visibilityState === "hidden") {
+        send_page_views();
+    }
+});
+window.addEventListener("pagehide", send_page_views);
+
+// -------- KIOSK -------- //
+
+var kiosk_queued = 0;  // Requests the service worker keeps until the network is back (see 'kiosk/service-worker.js').
+
+function kiosk_status() {
+    if (!navigator.onLine) {
+        return "No network: your answers are saved and sent later.";
+    }
+    return kiosk_queued > 0 ? "Sending your answers..." : "";
+}
+
+function show_kiosk_status() {
+    window.dash_clientside.set_props("kiosk_status", {children: kiosk_status()});
+}
+
+function sync_kiosk() {
+    if (navigator.serviceWorker.controller) {
+        navigator.serviceWorker.controller.postMessage("sync");
+    }
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    saxion: {
+        // Client-side page router, used when 'ROUTING_MODE' is 'client' (see 'main.py').
+        display_page: function (pathname, layouts) {
+            return JSON.parse(layouts[pathname] || layouts["/"]);
+        },
+        record_page_view: function (pathname, config) {
+            if (pathname && config) {
+                page_views_url = config.url;
+                add_page_view(pathname);
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        // Validation of the small programs, fired by the 'Run' buttons only (the text is read as state).
+        check_cpp_code: function (n_clicks, value) {
+            return check_code(n_clicks, value);
+        },
+        check_python_code: function (n_clicks, value) {
+            return check_code(n_clicks, value);
+        },
+
+        // Adaptive questionnaire: the answers of the question pages are kept within the browser (a new student starts on
+        // '/'), the 'Continue' link of every question page goes to the page of the next question.
+        forget_answers: function (pathname) {
+            return pathname === "/" ? {} : window.dash_clientside.no_update;
+        },
+        remember_answer: function (value, answers) {
+            var input_id = window.dash_clientside.callback_context.triggered[0].prop_id.split(".")[0];
+            var key = ANSWER_KEYS[input_id];
+            if (value == null || (answers || {})[key] === value) {
+                return window.dash_clientside.no_update;
+            }
+            var updated = Object.assign({}, answers);
+            updated[key] = value;
+            return updated;
+        },
+        choose_next_page: function (answers, policy) {
+            return next_page(policy, answers || {});
+        },
+
+        // Starts the marble game when its page is shown.
+        play_marble_game: function (questions, policy, answers) {
+            window.requestAnimationFrame(function () {  // After 'Dash' has put the canvas on the page.
+                var canvas = document.getElementById("marble_canvas");
+                if (canvas !== null && questions) {
+                    start_marble_game(canvas, questions, policy, answers);
+                }
+            });
+            return window.dash_clientside.no_update;
+        },
+
+        // Staff dashboard: every server-sent event (see 'analytics.py') replaces the data within 'staff_data'.
+        listen_to_staff_stream: function (url) {
+            if (staff_stream !== null) {
+                staff_stream.close();
+            }
+            staff_stream = new EventSource(url);
+            staff_stream.onmessage = function (event) {
+                if (document.getElementById("staff_status") === null) {
+                    staff_stream.close();  // The dashboard isn't shown anymore.
+                    staff_stream = null;
+                    return;
+                }
+                window.dash_clientside.set_props("staff_data", {data: JSON.parse(event.data)});
+            };
+            return window.dash_clientside.no_update;
+        },
+        show_staff_data: function (data) {
+            if (!data) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+
+            var studies = table(["Prior education", "Study", "Students"], data.studies.map(function (row) {
+                return [HIGH_SCHOOL_NAMES[row.high_school] || "Unknown", STUDY_NAMES[row.study] || row.study, row.students];
+            }));
+
+            var first = data.pages.length ? data.pages[0].students : 0;
+            var pages = table(["Page", "Students", "Of all students", "Left after the previous page"], data.pages.map(function (row, index) {
+                var previous = index > 0 ? data.pages[index - 1].students : row.students;
+                return [row.page, row.students, percentage(row.students, first), Math.max(previous - row.students, 0)];
+            }));
+
+            var projects = table(["Project", "Programs checked", "Passed", "Pass rate"], data.projects.map(function (row) {
+                return [PROJECT_NAMES[row.project] || row.project, row.attempts, row.passed, percentage(row.passed, row.attempts)];
+            }));
+
+            return [studies, pages, projects];
+        },
+        // Kiosk mode (see 'kiosk.py'): the service worker answers the page loads and the answers when the network is gone.
+        start_kiosk: function (config) {
+            if (!config || !("serviceWorker" in navigator)) {
+                return window.dash_clientside.no_update;
+            }
+            navigator.serviceWorker.register(config.service_worker);
+            navigator.serviceWorker.addEventListener("message", function (event) {
+                kiosk_queued = event.data.queued;
+                show_kiosk_status();
+            });
+            window.addEventListener("online", function () {
+                show_kiosk_status();
+                sync_kiosk();
+            });
+            window.addEventListener("offline", show_kiosk_status);
+            window.setInterval(sync_kiosk, config.sync_interval * 1000);
+            return kiosk_status();
+        },
+    },
+});
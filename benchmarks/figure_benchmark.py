@@ -0,0 +1,109 @@
+# Information:
+# Benchmark of the result chart ('/page-9'): the figure of 'plotly.express' versus the compact figure (see 'charts.py').
+# * Payload: the bytes of the 'graph_container' response (uncompressed, gzip and brotli when installed) and the build time.
+# * Render time: writes an HTML page that draws both figures with 'plotly.js' many times and shows the time per draw, open
+#   it within the browser of the kiosk (the render time depends on that machine).
+# Run from the root of the repository: python -m benchmarks.figure_benchmark [--html figure_benchmark.html]
+
+import argparse
+import gzip
+import json
+import time
+
+from dash import dcc
+from plotly.offline import get_plotlyjs
+
+from charts import build_compact_figure, build_figure
+from compression import brotli
+from layout_cache import serialize_response
+
+SCORES = (70, 95, 60, 80, 70)
+BUILD_ROUNDS = 50
+RENDER_ROUNDS = 50
+
+builders = {
+    "plotly": build_figure,
+    "compact": build_compact_figure,
+}
+
+HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Figure render benchmark</title><script>{plotly}</script></head>
+<body>
+<h1>Render time of the result chart</h1>
+<table id="results" border="1" cellpadding="6"><tr><th>Mode</th><th>Median (ms)</th><th>p95 (ms)</th></tr></table>
+<div id="chart" style="width: 700px; height: 450px;"></div>
+<script>
+var figures = {figures};
+var rounds = {rounds};
+var chart = document.getElementById("chart");
+var config = {{displayModeBar: false, responsive: false}};
+
+function percentile(times, percent) {{
+    var sorted = times.slice().sort(function (a, b) {{ return a - b; }});
+    return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * percent / 100))];
+}}
+
+async function measure(mode) {{
+    var times = [];
+    for (var round = 0; round < rounds; round++) {{
+        var figure = JSON.parse(figures[mode]);  // Parsed like a response of 'Dash'.
+        Plotly.purge(chart);
+        var started = performance.now();
+        await Plotly.newPlot(chart, figure.data, figure.layout, config);
+        times.push(performance.now() - started);
+    }}
+    var row = document.getElementById("results").insertRow();
+    [mode, percentile(times, 50).toFixed(2), percentile(times, 95).toFixed(2)].forEach(function (text) {{
+        row.insertCell().textContent = text;
+    }});
+}}
+
+(async function () {{
+    for (var mode in figures) {{
+        await measure(mode);
+    }}
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def graph_response(figure):
+    # The part of the 'show_chart' response with the figure, as 'Dash' sends it.
+    graph = dcc.Graph(id="Graph", figure=figure, config={"displayModeBar": False, "responsive": False})
+    return serialize_response("graph_container", "children", graph)
+
+
+def write_html(path, figures):
+    page = HTML_PAGE.format(
+        plotly=get_plotlyjs(),
+        figures=json.dumps({mode: json.dumps(figure) for mode, figure in figures.items()}),
+        rounds=RENDER_ROUNDS,
+    )
+    with open(path, "w", encoding="utf-8") as html_file:
+        html_file.write(page)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payload and render time of the result chart.")
+    parser.add_argument("--html", default="figure_benchmark.html", help="Page that measures the render time within a browser.")
+    arguments = parser.parse_args()
+
+    figures = {}
+    print("{:<10} {:>12} {:>12} {:>12} {:>14}".format("Mode", "Bytes", "gzip", "brotli", "Build (ms)"))
+    for mode, builder in builders.items():
+        builder(SCORES)  # The first build imports 'pandas' and 'plotly.express'.
+        started = time.perf_counter()
+        for _ in range(BUILD_ROUNDS):
+            figures[mode] = builder(SCORES)
+        build_milliseconds = (time.perf_counter() - started) / BUILD_ROUNDS * 1000
+
+        body = graph_response(figures[mode])
+        print("{:<10} {:>12} {:>12} {:>12} {:>14.3f}".format(
+            mode, len(body), len(gzip.compress(body, compresslevel=9)),
+            len(brotli.compress(body, quality=11)) if brotli is not None else "-", build_milliseconds))
+
+    write_html(arguments.html, figures)
+    print("Render time: open {} within a browser.".format(arguments.html))
@@ -0,0 +1,70 @@
+# Information:
+# Micro-benchmark for a page change: live 'display_page' (serialize the component tree) versus the pre-serialized layout cache.
+# Run from the root of the repository: python -m benchmarks.layout_cache_benchmark
+
+import json
+import timeit
+
+import main
+from layout_cache import serialize_response
+
+ROUNDS = 2000
+
+main.event_recorder.enabled = False  # The page changes below are no students (and have no session outside a request).
+
+
+def live_path(pathname):
+    return serialize_response("container", "children", main.display_page(pathname))
+
+
+def cached_path(pathname):
+    return main.layout_cache.lookup(pathname)["identity"]
+
+
+def request_path(client, pathname, encoding="gzip"):
+    body = {
+        "output": "container.children",
+        "outputs": {"id": "container", "property": "children"},
+        "inputs": [{"id": "url", "property": "pathname", "value": pathname}],
+        "changedPropIds": ["url.pathname"],
+        "state": [],
+    }
+    return client.post("/_dash-update-component", json=body, headers={"Accept-Encoding": encoding})
+
+
+def dash_path(client, pathname):
+    # The response of 'Dash' itself, without the layout cache in front of it.
+    main.layout_cache.enabled = False
+    try:
+        return request_path(client, pathname, encoding="identity").get_json()
+    finally:
+        main.layout_cache.enabled = True
+
+
+def report(name, seconds):
+    print("{:<34} {:>10.2f} us per page change".format(name, seconds / ROUNDS * 1e6))
+
+
+if __name__ == "__main__":
+    if not main.layout_cache.entries:
+        main.layout_cache.build()
+
+    pathnames = main.page_registry.paths()
+    client = main.server_run.test_client()
+    client.get("/")
+    for pathname in pathnames:
+        assert json.loads(cached_path(pathname)) == dash_path(client, pathname), "Cache is out of date: {}".format(pathname)
+
+    print("Serialization only ({} rounds over {} pages):".format(ROUNDS, len(pathnames)))
+    report("live (to_plotly_json + JSON)", timeit.timeit(lambda: [live_path(p) for p in pathnames], number=ROUNDS) / len(pathnames))
+    report("cached (dict lookup)", timeit.timeit(lambda: [cached_path(p) for p in pathnames], number=ROUNDS) / len(pathnames))
+
+    print("Full request through the Flask test client:")
+    main.layout_cache.enabled = False
+    report("live", timeit.timeit(lambda: request_path(client, "/page-4"), number=ROUNDS))
+    main.layout_cache.enabled = True
+    report("cached", timeit.timeit(lambda: request_path(client, "/page-4"), number=ROUNDS))
+
+    sizes = main.layout_cache.lookup("/page-4")
+    print("Payload /page-4: {} bytes, gzip {} bytes{}".format(
+        len(sizes["identity"]), len(sizes["gzip"]), ", brotli {} bytes".format(len(sizes["br"])) if "br" in sizes else ""))
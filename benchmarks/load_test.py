@@ -0,0 +1,366 @@
+# Information:
+# Load test that simulates students walking through the whole funnel: '/' -> '/page-1' ... '/page-20'.
+# Every simulated student behaves like the 'Dash' renderer in a browser: a changed property fires all the server callbacks
+# that use it as input, and a new page fires the initial callbacks of its components. On the way the student selects the
+# dropdowns, picks an interest, types the small programs (keystroke by keystroke) and presses 'Run'.
+# The report shows the latency (p50/p95/p99), throughput and error rate per callback, use it to size kiosks and servers.
+#
+# Run from the root of the repository, against the Flask test client (in-process):
+#   python -m benchmarks.load_test --students 200 --concurrency 20
+# or against a running server:
+#   python -m benchmarks.load_test --url http://127.0.0.1:8050 --students 200 --concurrency 20
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+CPP_PROGRAM = "#include <iostream>\n\nint main() {\n\tstd::cout << \"Hello, Saxion!\" << std::endl;\n\treturn 0;\n}"
+PYTHON_PROGRAM = "if __name__ == \"__main__\":\n\tprint(\"Hello, Saxion!\")"
+PAGE_VIEW_BATCH = 10  # Same as 'PAGE_VIEW_BATCH' within 'assets/clientside.js'.
+
+# What a student does on a page, besides reading it: (component id, property, value).
+page_actions = {
+    "/page-1": [("initial_high_school_filter", "value", ["HAVO_SAX", "VWO_SAX", "MBO_SAX"])],
+    "/page-2": [("initial_study_filter", "value", ["ACS_SAX", "EEE_SAX", "MT_SAX", "ICT_SAX", "IPO_SAX", "NONE_SAX"])],
+    "/page-3": [("initial_interest_filter", "value", ["MICRO_CONT_SAX", "ROBOT_SAX", "PCB_SAX", "PROD_DESIGN_SAX"])],
+    # The marble game runs within the browser, only its answers are sent (together), the server then shows '/page-9'.
+    "/page-5": [("marble_answers", "data", [
+        {"marble_electronics": electronics, "marble_mechanics": mechanics, "marble_focus": focus, "marble_components": components}
+        for electronics in ("YES", "NO") for mechanics in ("YES", "NO") for focus in ("GLOBAL", "SPECIFIC")
+        for components in ("HOW", "APPLY")
+    ])],
+}
+funnel = ["/page-{}".format(number) for number in range(1, 21) if number not in (6, 7, 8)]
+# Code pages: (textarea, 'Run' button, store that the browser fills in for a real check, program).
+code_pages = {
+    "/page-11": ("input_box_coding", "run_program_button", "code_submission", CPP_PROGRAM),
+    "/page-19": ("input_box_coding_software_engineering", "run_program_button_software_engineering",
+                 "code_submission_software_engineering", PYTHON_PROGRAM),
+}
+
+# -------- TRANSPORTS -------- #
+
+
+class LocalTransport:
+    # Flask test client, every student gets its own client (and so its own session cookie).
+    def __init__(self, server):
+        self.client = server.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data()
+
+    def post(self, path, body):
+        response = self.client.post(path, json=body)
+        return response.status_code, response.get_data()
+
+
+class HttpTransport:
+    def __init__(self, base_url):
+        import requests  # Installed together with 'dash'.
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def get(self, path):
+        response = self.session.get(self.base_url + path, timeout=30)
+        return response.status_code, response.content
+
+    def post(self, path, body):
+        response = self.session.post(self.base_url + path, json=body, timeout=30)
+        return response.status_code, response.content
+
+
+# -------- STATISTICS -------- #
+
+
+class Statistics:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.payload_bytes = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, label, seconds, ok, size):
+        with self._lock:
+            self.latencies[label].append(seconds)
+            self.payload_bytes[label] += size
+            if not ok:
+                self.errors[label] += 1
+
+    def report(self, wall_seconds):
+        rows = {}
+        for label, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            rows[label] = {
+                "requests": count,
+                "throughput_per_second": count / wall_seconds,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "error_rate": self.errors[label] / count,
+                "mean_payload_bytes": self.payload_bytes[label] / count,
+            }
+        return rows
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+# -------- SIMULATED STUDENT -------- #
+
+
+def component_props(tree, found=None):
+    # Collect the properties of every component with an id within a (serialized) layout.
+    found = {} if found is None else found
+    if isinstance(tree, list):
+        for child in tree:
+            component_props(child, found)
+    elif isinstance(tree, dict) and "props" in tree:
+        props = tree["props"]
+        if "id" in props and isinstance(props["id"], str):
+            found[props["id"]] = {key: value for key, value in props.items() if key != "children"}
+        component_props(props.get("children"), found)
+    return found
+
+
+class Student:
+    def __init__(self, transport, app_info, statistics, rng, think_time):
+        self.transport = transport
+        self.app_info = app_info
+        self.statistics = statistics
+        self.rng = rng
+        self.think_time = think_time
+        self.props = {}  # Component id -> properties, of everything that is on the screen.
+        self.page_views = []  # With client routing, the pages that the browser hasn't sent yet.
+
+    def request(self, label, method, *args):
+        started = time.perf_counter()
+        try:
+            status, body = getattr(self.transport, method)(*args)
+        except Exception:
+            self.statistics.add(label, time.perf_counter() - started, False, 0)
+            return None
+        self.statistics.add(label, time.perf_counter() - started, status < 400, len(body))
+        return body if status == 200 else None
+
+    def present(self, dependency):
+        return dependency["id"] in self.props
+
+    def fire(self, callback):
+        body = {
+            "output": callback["output"],
+            "outputs": [dict(output) for output in callback["outputs_list"]] if len(callback["outputs_list"]) > 1 else dict(callback["outputs_list"][0]),
+            "inputs": [dict(item, value=self.props[item["id"]].get(item["property"])) for item in callback["inputs"]],
+            "state": [dict(item, value=self.props[item["id"]].get(item["property"])) for item in callback["state"]],
+            "changedPropIds": callback["changed"],
+        }
+        response = self.request(callback["label"], "post", self.app_info["callback_path"], body)
+        if response is None:
+            return
+
+        for output_id, values in json.loads(response).get("response", {}).items():
+            for prop, value in values.items():
+                self.props.setdefault(output_id, {})[prop] = value
+                if prop == "children" and output_id == "container":
+                    self.show_page(value)
+                elif prop == "pathname" and output_id == "url":
+                    self.navigate(value)  # A callback moved the student to another page.
+
+    def fire_for(self, callbacks, changed):
+        for callback in callbacks:
+            if all(self.present(item) for item in callback["inputs"] + callback["state"]) and \
+                    all(self.present(output) for output in callback["outputs_list"]):
+                self.fire(dict(callback, changed=changed))
+
+    def change(self, component_id, prop, value):
+        self.props.setdefault(component_id, {})[prop] = value
+        key = "{}.{}".format(component_id, prop)
+        self.fire_for(self.app_info["by_input"].get(key, []), [key])
+
+    def show_page(self, layout):
+        # Remove the components of the previous page, then fire the initial callbacks of the new components.
+        for component_id in [component_id for component_id in self.props if component_id not in self.app_info["root_ids"]]:
+            del self.props[component_id]
+        new_props = component_props(layout)
+        self.props.update(new_props)
+        initial = [callback for callback in self.app_info["callbacks"]
+                   if not callback["prevent_initial_call"] and any(output["id"] in new_props for output in callback["outputs_list"])]
+        self.fire_for(initial, [])
+
+    def navigate(self, pathname):
+        if self.app_info["static_layouts"] is not None:
+            # Client-side routing, the page change itself doesn't reach the server.
+            self.change("url", "pathname", pathname)
+            self.show_page(json.loads(self.app_info["static_layouts"].get(pathname, self.app_info["static_layouts"]["/"])))
+            self.page_views.append(pathname)
+            if len(self.page_views) >= PAGE_VIEW_BATCH:
+                self.send_page_views()
+        else:
+            self.change("url", "pathname", pathname)
+
+    def send_page_views(self):
+        # Same batches as 'record_page_view' within 'assets/clientside.js'.
+        if self.page_views and "page_view" in self.props:
+            self.request("page views", "post", self.props["page_view"]["data"]["url"], {"pages": self.page_views})
+        self.page_views = []
+
+    def run_intervals(self, limit=200):
+        # Tick every enabled 'dcc.Interval' (for instance the poll for a compiled program) until they are all disabled.
+        for _ in range(limit):
+            intervals = [component_id for component_id, props in self.props.items() if "interval" in props and props.get("disabled") is False]
+            if not intervals:
+                return
+            time.sleep(min(self.props[component_id]["interval"] for component_id in intervals) / 1000)
+            for component_id in intervals:
+                self.change(component_id, "n_intervals", (self.props[component_id].get("n_intervals") or 0) + 1)
+
+    def walk(self):
+        self.request("index", "get", "/")
+        self.props = component_props(self.app_info["layout"])
+        self.navigate("/")
+
+        for pathname in funnel:
+            if self.props["url"].get("pathname") != pathname:
+                self.navigate(pathname)
+
+            for component_id, prop, choices in page_actions.get(pathname, []):
+                self.change(component_id, prop, self.rng.choice(choices))
+
+            if pathname in code_pages:
+                textarea, button, store, program = code_pages[pathname]
+                for length in range(1, len(program) + 1, self.rng.randint(1, 4)):  # Students type a few characters per event.
+                    self.change(textarea, "value", program[:length])
+                self.change(textarea, "value", program)
+                n_clicks = (self.props.get(button, {}).get("n_clicks") or 0) + 1
+                self.change(button, "n_clicks", n_clicks)
+                if store in self.props:
+                    # The browser sends every program to the server.
+                    self.change(store, "data", {"source": program, "n_clicks": n_clicks})
+                    self.run_intervals()
+
+            if self.think_time:
+                time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        self.send_page_views()  # The tab is closed.
+
+
+# -------- APPLICATION INFORMATION -------- #
+
+
+def load_app_info(transport, callback_names):
+    # Everything a browser loads once: the root layout and the callback graph.
+    status, layout = transport.get("/_dash-layout")
+    status, dependencies = transport.get("/_dash-dependencies")
+    layout = json.loads(layout)
+    dependencies = json.loads(dependencies)
+
+    root_props = component_props(layout)
+    static_layouts = root_props.get("static_layouts", {}).get("data")
+
+    callbacks = []
+    by_input = defaultdict(list)
+    for dependency in dependencies:
+        if dependency.get("clientside_function"):
+            continue  # Runs within the browser.
+        outputs = [dict(zip(("id", "property"), output.rsplit(".", 1))) for output in dependency["output"].strip(".").split("...")]
+        callback = {
+            "output": dependency["output"],
+            "outputs_list": outputs,
+            "inputs": dependency["inputs"],
+            "state": dependency["state"],
+            "prevent_initial_call": dependency.get("prevent_initial_call", False),
+            "label": callback_names.get(dependency["output"], dependency["output"]),
+        }
+        callbacks.append(callback)
+        for item in dependency["inputs"]:
+            by_input["{}.{}".format(item["id"], item["property"])].append(callback)
+
+    return {
+        "layout": layout,
+        "static_layouts": static_layouts,
+        "callbacks": callbacks,
+        "by_input": by_input,
+        "callback_path": "/_dash-update-component",
+        "root_ids": set(root_props),
+    }
+
+
+def local_callback_names(app):
+    # 'display_page', 'show_chart', ... with the first output, so the report shows which part of the page was updated.
+    names = {}
+    for output, callback in app.callback_map.items():
+        function = callback.get("callback")
+        name = getattr(function, "__name__", output)
+        names[output] = "{} [{}]".format(name, output.strip(".").split(".")[0])
+    return names
+
+
+# -------- MAIN -------- #
+
+
+def run(arguments):
+    if arguments.url:
+        make_transport = lambda: HttpTransport(arguments.url)
+        callback_names = {}
+    else:
+        import main
+
+        make_transport = lambda: LocalTransport(main.server_run)
+        callback_names = local_callback_names(main.app)
+
+    app_info = load_app_info(make_transport(), callback_names)
+    statistics = Statistics()
+
+    def simulate(student_number):
+        student = Student(make_transport(), app_info, statistics, random.Random(arguments.seed + student_number), arguments.think_time)
+        student.walk()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=arguments.concurrency) as executor:
+        list(executor.map(simulate, range(arguments.students)))
+    wall_seconds = time.perf_counter() - started
+
+    return statistics, wall_seconds
+
+
+def print_report(statistics, wall_seconds, students):
+    rows = statistics.report(wall_seconds)
+    total = sum(row["requests"] for row in rows.values())
+    errors = sum(statistics.errors.values())
+
+    print("{} students in {:.2f} s, {} requests ({:.1f} req/s), error rate {:.2%}".format(
+        students, wall_seconds, total, total / wall_seconds, errors / max(total, 1)))
+    print("{:<58} {:>8} {:>9} {:>9} {:>9} {:>9} {:>7} {:>9}".format(
+        "callback", "requests", "req/s", "p50 ms", "p95 ms", "p99 ms", "errors", "bytes"))
+    for label, row in rows.items():
+        print("{:<58} {:>8} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>7.2%} {:>9.0f}".format(
+            label, row["requests"], row["throughput_per_second"], row["p50_ms"], row["p95_ms"], row["p99_ms"],
+            row["error_rate"], row["mean_payload_bytes"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate students walking through the StudyCheckinator 900.")
+    parser.add_argument("--url", help="Base URL of a running server, default: the Flask test client (in-process).")
+    parser.add_argument("--students", type=int, default=50, help="Number of simulated students.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of students at the same time.")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds a student reads a page.")
+    parser.add_argument("--seed", type=int, default=2022)
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    arguments = parser.parse_args()
+
+    statistics, wall_seconds = run(arguments)
+    print_report(statistics, wall_seconds, arguments.students)
+
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as result_file:
+            json.dump({"students": arguments.students, "concurrency": arguments.concurrency, "wall_seconds": wall_seconds,
+                       "callbacks": statistics.report(wall_seconds)}, result_file, indent=2)
@@ -0,0 +1,119 @@
+# Information:
+# Checks the callbacks of the application against all the layouts a student can reach (the root layout and every page of
+# 'pages.json'). Every callback is sent to the browser within '_dash-dependencies' and resolved on every page load, so:
+# * dead callbacks: an output (or all the inputs) is never within any layout, 'Dash' can never call it,
+# * callbacks with inputs on different pages: 'Dash' only calls a callback when all its inputs are on the screen (unless
+#   an input has 'allow_optional'), so these never fire either,
+# * shadowed functions: two callbacks with the same function name, the second one hides the first one within this script,
+# * callbacks that fire together: two server callbacks with the same input, one change costs two requests (these could be
+#   merged into one callback with several outputs).
+#
+# Run from the root of the repository (exits with status 1 when there are dead callbacks, callbacks with inputs on different
+# pages or shadowed functions):
+#   python3 callback_analyzer.py
+# 'PRUNE_CALLBACKS=1' drops the dead callbacks while the application starts (see 'main.py').
+
+from collections import defaultdict
+
+
+def component_ids(component, found=None):
+    # All the ids within a layout (a tree of components, lists and strings).
+    found = set() if found is None else found
+    if isinstance(component, (list, tuple)):
+        for child in component:
+            component_ids(child, found)
+    elif hasattr(component, "to_plotly_json"):
+        component_id = getattr(component, "id", None)
+        if component_id is not None:
+            found.add(component_id)
+        component_ids(getattr(component, "children", None), found)
+    return found
+
+
+def callback_ids(callback):
+    # Ids of the outputs and inputs of an entry within 'app._callback_list'.
+    outputs = [item.rsplit(".", 1)[0] for item in callback["output"].strip(".").split("...")]
+    inputs = [item["id"] for item in callback["inputs"]]
+    return [output.split("@")[0] for output in outputs], inputs  # Without the hash of 'allow_duplicate'.
+
+
+def callback_name(app, callback):
+    if callback.get("clientside_function"):
+        return "clientside:{}".format(callback["clientside_function"]["function_name"])
+    function = app.callback_map.get(callback["output"], {}).get("callback")
+    return getattr(function, "__name__", "unknown")
+
+
+def analyze(app, layouts):
+    # 'layouts' starts with the root layout, every other layout is a page that's shown within it.
+    known_ids = set()
+    for layout in layouts:
+        component_ids(layout, known_ids)
+    root_ids = component_ids(layouts[0]) if layouts else set()
+    screens = [root_ids | component_ids(layout) for layout in layouts[1:]] or [root_ids]
+
+    dead = []
+    split = []
+    names = defaultdict(list)
+    listeners = defaultdict(list)
+    for callback in app._callback_list:
+        name = callback_name(app, callback)
+        outputs, inputs = callback_ids(callback)
+
+        missing_outputs = [output for output in outputs if output not in known_ids]
+        if missing_outputs or not any(input_id in known_ids for input_id in inputs):
+            dead.append({"callback": name, "output": callback["output"], "missing": missing_outputs or inputs})
+            continue
+
+        required = [item["id"] for item in callback["inputs"] if not item.get("allow_optional")]
+        if not any(all(input_id in screen for input_id in required) for screen in screens):
+            split.append({"callback": name, "output": callback["output"], "inputs": required})
+
+        if not callback.get("clientside_function"):
+            names[name].append(callback["output"])
+            for item in callback["inputs"]:
+                listeners["{}.{}".format(item["id"], item["property"])].append(name)
+
+    return {
+        "dead": dead,
+        "split": split,
+        "shadowed": {name: outputs for name, outputs in names.items() if len(outputs) > 1},
+        "fire_together": {input_name: callbacks for input_name, callbacks in listeners.items() if len(callbacks) > 1},
+    }
+
+
+def prune_dead_callbacks(app, report):
+    # Removes the dead callbacks from '_dash-dependencies' and from the callback map, must run before the first request.
+    dead_outputs = {callback["output"] for callback in report["dead"]}
+    app._callback_list[:] = [callback for callback in app._callback_list if callback["output"] not in dead_outputs]
+    for output in dead_outputs:
+        app.callback_map.pop(output, None)
+    return len(dead_outputs)
+
+
+def print_report(report):
+    print("Dead callbacks (never called, an output or all the inputs are within no layout): {}".format(len(report["dead"])))
+    for callback in report["dead"]:
+        print("  {:<40} {} (missing: {})".format(callback["callback"], callback["output"], ", ".join(callback["missing"])))
+
+    print("Callbacks with inputs on different pages (never called, no page shows all the inputs): {}".format(len(report["split"])))
+    for callback in report["split"]:
+        print("  {:<40} {} (inputs: {})".format(callback["callback"], callback["output"], ", ".join(callback["inputs"])))
+
+    print("Shadowed functions (several callbacks with the same name): {}".format(len(report["shadowed"])))
+    for name, outputs in report["shadowed"].items():
+        print("  {:<40} {}".format(name, ", ".join(outputs)))
+
+    print("Server callbacks that fire together on the same input (candidates to merge): {}".format(len(report["fire_together"])))
+    for input_name, callbacks in report["fire_together"].items():
+        print("  {:<40} -> {}".format(input_name, " + ".join(callbacks)))
+
+
+if __name__ == "__main__":
+    import sys
+
+    import main
+
+    result = analyze(main.app, main.reachable_layouts())
+    print_report(result)
+    sys.exit(1 if result["dead"] or result["split"] or result["shadowed"] else 0)
@@ -0,0 +1,124 @@
+# Information:
+# Result charts (see '/page-9'), building a figure with 'pandas' and 'plotly' is by far the slowest part of the application.
+# Only a handful of different score vectors exist, so every figure is built once and kept within a bounded LRU cache.
+# A cache hit returns a plain dict (JSON types only), without touching 'pandas' or 'plotly'. Both are imported on the first
+# build, so a worker starts without them (see 'load_plotting' and 'warm_up' within 'main.py').
+#
+# 'FIGURE_MODE':
+# * 'compact' (default): the figure is written directly as a dict, without 'pandas' or 'plotly'. One trace with a colour
+#   per bar (instead of one trace per education), a small template that's shared by all the figures (instead of the full
+#   default template of 'plotly', which is most of the payload) and the scores as a base64 typed array.
+# * 'plotly': the figure of 'plotly.express', with the default template.
+# Run 'python3 -m benchmarks.figure_benchmark' to compare the payload and the render time within the browser.
+
+import base64
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from scoring import education_names
+
+FIGURE_CACHE_SIZE = int(os.environ.get("FIGURE_CACHE_SIZE", 256))
+FIGURE_MODE = os.environ.get("FIGURE_MODE", "compact")
+
+# The colours of the educations, the same ones 'plotly.express' uses.
+education_colors = ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A"]
+
+# Only the parts of the default template of 'plotly' the bar chart shows, shared by every compact figure.
+compact_template = {
+    "layout": {
+        "font": {"color": "#2a3f5f"},
+        "plot_bgcolor": "#E5ECF6",
+        "xaxis": {"gridcolor": "white", "linecolor": "white", "ticks": ""},
+        "yaxis": {"gridcolor": "white", "linecolor": "white", "ticks": "", "zerolinecolor": "white"},
+        "hoverlabel": {"align": "left"},
+    },
+}
+
+
+def load_plotting():
+    # The heavy imports, only needed to build a figure.
+    import pandas
+    import plotly.express
+
+    return pandas, plotly.express
+
+
+def build_figure(scores):
+    pd, px = load_plotting()
+
+    dataframe = pd.DataFrame({
+        "Education": education_names,
+        "Score (in %)": list(scores),
+    })
+
+    fig_of_data = px.bar(dataframe, x="Education", y="Score (in %)", barmode="group", color="Education", title="Best fit for education")
+    fig_of_data.update_layout(title_text="Best fit for your education", title_x=0.5)
+
+    return json.loads(fig_of_data.to_json())  # Plain lists and dicts, so serializing a cached figure is cheap.
+
+
+def typed_array(values, dtype="u1"):
+    # Numbers as a typed array of 'plotly.js': the raw bytes in base64, instead of a JSON list.
+    return {"dtype": dtype, "bdata": base64.b64encode(np.asarray(values, dtype=dtype).tobytes()).decode("ascii")}
+
+
+def build_compact_figure(scores):
+    scores = np.clip(np.asarray(scores), 0, 100)  # Scores are percentages, one byte each.
+    return {
+        "data": [{
+            "type": "bar",
+            "x": education_names,
+            "y": typed_array(scores),
+            "marker": {"color": education_colors},
+            "hovertemplate": "Education=%{x}<br>Score (in %)=%{y}<extra></extra>",
+        }],
+        "layout": {
+            "template": compact_template,
+            "title": {"text": "Best fit for your education", "x": 0.5},
+            "xaxis": {"title": {"text": "Education"}},
+            "yaxis": {"title": {"text": "Score (in %)"}},
+        },
+    }
+
+
+class FigureCache:
+    def __init__(self, max_size=FIGURE_CACHE_SIZE, builder=build_figure):
+        self.max_size = max_size
+        self.builder = builder
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()  # Score vector -> figure.
+        self._lock = threading.Lock()
+
+    def get(self, scores):
+        key = tuple(scores)
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+
+        figure = self.builder(key)  # Built outside of the lock, other students don't have to wait.
+
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_size:
+                self._figures.popitem(last=False)
+        return figure
+
+    def warm(self, score_vectors):
+        for scores in score_vectors:
+            self.get(scores)
+
+    def __len__(self):
+        return len(self._figures)
+
+
+figure_cache = FigureCache(builder=build_compact_figure if FIGURE_MODE == "compact" else build_figure)
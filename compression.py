@@ -0,0 +1,165 @@
+# Information:
+# Response compression, for the kiosks on a shared Wi-Fi network without a proxy in front of the server.
+# * Static files (the component bundles of 'Dash' and the files within 'assets/'): compressed once, on first use, at the
+#   highest level, and kept within a bounded LRU store ('COMPRESSED_CACHE_BYTES'). The key contains the URL (with the
+#   fingerprint of the file) and the size of the file, so a changed file is compressed again.
+# * Pre-serialized responses (see 'layout_cache.py' and 'http_cache.py'): compressed once when they're built ('compress_all').
+# * Everything else, for instance the callback responses: compressed on the fly (at a faster level) when the body is larger
+#   than 'COMPRESSION_MIN_SIZE' bytes, smaller bodies aren't worth the time.
+# The encoding follows the 'Accept-Encoding' header of the browser: brotli when the 'brotli' package is installed, else gzip.
+# A strong ETag belongs to one exact body, so a compressed body gets the weak version of the ETag ('encoded_etag').
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import flask
+
+try:
+    import brotli  # Optional, only used when installed.
+except ImportError:
+    brotli = None
+
+COMPRESSION = os.environ.get("COMPRESSION", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))  # Bytes.
+COMPRESSED_CACHE_BYTES = int(os.environ.get("COMPRESSED_CACHE_BYTES", 32 * 1024 * 1024))
+
+# Types worth compressing, images within 'assets/' (PNG, WebP) are compressed already.
+compressible_types = {"application/json", "application/javascript", "text/javascript", "text/css", "text/html",
+                      "text/plain", "image/svg+xml", "image/x-icon"}
+
+
+def accepted_encodings(header):
+    # Parse an 'Accept-Encoding' header, for instance "gzip, deflate, br;q=0.9" -> {"gzip", "deflate", "br"}.
+    encodings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header, available=("br", "gzip")):
+    # Prefer brotli (smallest), then gzip, else the uncompressed bytes.
+    encodings = accepted_encodings(header)
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in encodings or "*" in encodings):
+            if encoding != "br" or brotli is not None:
+                return encoding
+    return "identity"
+
+
+def compress(body, encoding, fast=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=5 if fast else 11)
+    return gzip.compress(body, compresslevel=6 if fast else 9)
+
+
+def strong_etag(body):
+    # Shared by 'http_cache.py' and 'layout_cache.py': a hash of the body, the same within every worker.
+    return '"{}"'.format(hashlib.sha256(body).hexdigest()[:32])
+
+
+def opaque_tag(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(header, etag):
+    # 'If-None-Match' is '*' or a list of ETags. Weak comparison, as RFC 9110 asks for this header: 'W/"x"' matches '"x"'
+    # (the ETag of a compressed body, see 'encoded_etag').
+    if not header:
+        return False
+    tags = [opaque_tag(tag.strip()) for tag in header.split(",")]
+    return "*" in tags or opaque_tag(etag) in tags
+
+
+def encoded_etag(etag, encoding):
+    # The gzip and brotli bodies differ byte for byte from the original, only a weak ETag may be shared between them.
+    if not etag or encoding == "identity" or etag.startswith("W/"):
+        return etag
+    return "W/" + etag
+
+
+def compress_all(body):
+    # Every encoding of a response that's sent many times, to be stored next to the uncompressed bytes.
+    encodings = {"gzip": compress(body, "gzip")}
+    if brotli is not None:
+        encodings["br"] = compress(body, "br")
+    return encodings
+
+
+class CompressedStore:
+    # Compressed static files, the least recently used ones are dropped when the store holds more than 'max_bytes'.
+
+    def __init__(self, max_bytes=COMPRESSED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._bodies = OrderedDict()  # (key, encoding) -> compressed bytes.
+        self._lock = threading.Lock()
+
+    def get(self, key, encoding, body):
+        with self._lock:
+            compressed = self._bodies.get((key, encoding))
+            if compressed is not None:
+                self._bodies.move_to_end((key, encoding))
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = compress(body, encoding)  # Outside of the lock, other requests don't have to wait.
+
+        with self._lock:
+            if (key, encoding) not in self._bodies:
+                self._bodies[(key, encoding)] = compressed
+                self.size += len(compressed)
+            while self.size > self.max_bytes and self._bodies:
+                self.size -= len(self._bodies.popitem(last=False)[1])
+        return compressed
+
+
+class ResponseCompressor:
+    def __init__(self, app, enabled=COMPRESSION, min_size=COMPRESSION_MIN_SIZE, store=None):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.store = store or CompressedStore()
+        prefix = app.config.routes_pathname_prefix
+        self.static_prefixes = (
+            prefix + "_dash-component-suites/",
+            "{}{}/".format(prefix, app.config.assets_url_path.strip("/")),
+        )
+
+    def compress_response(self, response):
+        request = flask.request
+        if (not self.enabled or request.method not in ("GET", "POST") or response.status_code != 200
+                or (response.is_streamed and not response.direct_passthrough)  # Server-sent events.
+                or "Content-Encoding" in response.headers or response.mimetype not in compressible_types):
+            return response
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        response.vary.add("Accept-Encoding")
+        if encoding == "identity":
+            return response
+
+        response.direct_passthrough = False  # Files of 'send_file' are read into memory, they're small.
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        if request.method == "GET" and request.path.startswith(self.static_prefixes):
+            compressed = self.store.get((request.full_path, len(body)), encoding, body)
+        else:
+            compressed = compress(body, encoding, fast=True)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        if "ETag" in response.headers:
+            response.headers["ETag"] = encoded_etag(response.headers["ETag"], encoding)  # For instance of 'send_file'.
+        return response
+
+    def install(self, server):
+        server.after_request(self.compress_response)
@@ -0,0 +1,171 @@
+# Information:
+# Funnel events of the students: the choices they make, how far they get through the pages and whether their code passes.
+# A callback only puts the event within an in-memory queue (no disk access, no lock held for long), a background thread
+# writes the queued events in batches to an append-only SQLite database (WAL mode, so the workers of 'serve.py' and the
+# readers of the staff dashboard don't block each other). When the queue is full (the disk can't keep up with a burst),
+# new events are dropped and counted instead of slowing down the students.
+#
+# Kinds of events (the value is stored as JSON):
+# * page_view: the pathname of the page, for instance "/page-3". With client routing the browser sends these in batches
+#   to '/_page-views' (see 'install'), a page change doesn't need a request of its own.
+# * high_school, study, interest: the value of the dropdown or radio item.
+# * marble: the answers of the marble game, for instance {"marble_electronics": "YES", ...}.
+# * code_result: {"project": "cpp" or "python", "status": status of the sandbox, "passed": true/false}.
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import flask
+
+from session_store import current_session_id
+
+# -------- CONFIGURATION -------- #
+
+EVENTS_DB = os.environ.get("EVENTS_DB", "events.sqlite3")
+EVENTS_ENABLED = os.environ.get("EVENTS", "1") == "1"
+EVENT_QUEUE_SIZE = int(os.environ.get("EVENT_QUEUE_SIZE", 100000))  # Events waiting for the writer, more are dropped.
+EVENT_BATCH_SIZE = 1000  # Events written within one transaction.
+EVENT_FLUSH_INTERVAL = 1.0  # Seconds an event waits at most before it's written.
+PAGE_VIEW_BATCH = 50  # Page views within one request of the browser, at most.
+MAX_PATHNAME = 200  # Characters.
+PAGE_VIEWS_PATH = "_page-views"  # Below the prefix of the routes of 'Dash'.
+INTERNAL_REQUEST = "saxion.internal_request"  # WSGI environ key of the requests of 'internal_client', these are no students.
+
+
+def connect(path=EVENTS_DB):
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, time REAL NOT NULL, "
+        "session_id TEXT, kind TEXT NOT NULL, value TEXT)"
+    )
+    return connection
+
+
+def read_events(connection, after_id=0, limit=10000):
+    # Events in the order they were written, a reader continues after the last id it has seen.
+    rows = connection.execute(
+        "SELECT id, time, session_id, kind, value FROM events WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+    ).fetchall()
+    return [(event_id, timestamp, session_id, kind, json.loads(value)) for event_id, timestamp, session_id, kind, value in rows]
+
+
+class EventRecorder:
+    def __init__(self, path=EVENTS_DB, enabled=EVENTS_ENABLED, queue_size=EVENT_QUEUE_SIZE,
+                 batch_size=EVENT_BATCH_SIZE, flush_interval=EVENT_FLUSH_INTERVAL):
+        self.path = path
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._write_lock = threading.Lock()
+        self._writer_pid = None
+
+    def record(self, kind, value):
+        # Called within a callback: one 'put' on the queue, the writer thread does the rest.
+        if not self.enabled or (flask.has_request_context() and flask.request.environ.get(INTERNAL_REQUEST)):
+            return
+        if self._writer_pid != os.getpid():
+            self.start_writer()
+        try:
+            self._queue.put_nowait((time.time(), current_session_id(), kind, json.dumps(value)))
+        except queue.Full:
+            self.dropped += 1
+
+    def record_page_views(self, pathnames):
+        # A batch of page views from the browser, returns how many were recorded (anything that isn't a path is skipped).
+        recorded = 0
+        for pathname in pathnames:
+            if isinstance(pathname, str) and pathname.startswith("/") and len(pathname) <= MAX_PATHNAME:
+                self.record("page_view", pathname)
+                recorded += 1
+        return recorded
+
+    def install(self, server, prefix="/"):
+        @server.route(prefix + PAGE_VIEWS_PATH, methods=["POST"])
+        def record_browser_page_views():
+            # Sent with 'navigator.sendBeacon', the browser doesn't read the response.
+            body = flask.request.get_json(force=True, silent=True)
+            pathnames = body.get("pages") if isinstance(body, dict) else None
+            if not isinstance(pathnames, list) or len(pathnames) > PAGE_VIEW_BATCH:
+                flask.abort(400)
+            self.record_page_views(pathnames)
+            return "", 204
+
+    def start_writer(self):
+        # One thread per process, a forked worker (see 'serve.py') starts its own one on its first event.
+        with self._write_lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)  # Events of the parent process belong to the parent.
+        threading.Thread(target=self.write_forever, name="event-writer", daemon=True).start()
+
+    def take_batch(self, timeout):
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def write_batch(self, connection, batch):
+        with self._write_lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany("INSERT INTO events (time, session_id, kind, value) VALUES (?, ?, ?, ?)", batch)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self.written += len(batch)
+
+    def write_forever(self):
+        connection = connect(self.path)
+        while True:
+            batch = self.take_batch(self.flush_interval)
+            if not batch:
+                continue
+            try:
+                self.write_batch(connection, batch)
+            except sqlite3.Error:
+                self.dropped += len(batch)  # The database is locked or full, the students must not notice it.
+            if len(batch) < self.batch_size:
+                time.sleep(self.flush_interval)  # Wait for the next batch to fill up, instead of writing every event.
+
+    def flush(self):
+        # Writes everything that's queued right now, used when the process stops.
+        if self._writer_pid != os.getpid():
+            return
+        batch = self.take_batch(0)
+        if batch:
+            connection = connect(self.path)
+        while batch:
+            self.write_batch(connection, batch)
+            batch = self.take_batch(0)
+
+
+def internal_client(server):
+    # A test client for the requests the server sends itself (the warm-up, the kiosk manifest): their events aren't recorded,
+    # while the students that are served at the same time keep theirs.
+    client = server.test_client()
+    client.environ_base[INTERNAL_REQUEST] = True
+    return client
+
+
+def create_event_recorder():
+    recorder = EventRecorder()
+    atexit.register(recorder.flush)
+    return recorder
@@ -0,0 +1,112 @@
+# Information:
+# HTTP caching for the GET endpoints of 'Dash'. A kiosk reloads the application many times a day, but between two deploys
+# the index page, the root layout ('/_dash-layout') and the callbacks ('/_dash-dependencies') never change. These are
+# serialized once, with a strong ETag (a hash of the body, the same within every worker, weak for a compressed body), and a
+# browser that sends a matching 'If-None-Match' gets a '304 Not Modified' without a body. Per endpoint type:
+# * index page, root layout, callbacks: 'no-cache' (the browser keeps them, but asks with the ETag before using them),
+# * component bundles and assets with a fingerprint within their URL ('v4_4_1m...' or '?m=...'): cached for a year,
+# * the pages of 'display_page' are answered by 'layout_cache.py', with an ETag as well.
+# The serialized responses are compressed once as well (see 'compression.py'). They're dropped when 'pages.json' changes (see 'clear'), and built again on the next request.
+
+import os
+import re
+import threading
+
+import flask
+
+from compression import choose_encoding, compress_all, encoded_etag, etag_matches, strong_etag
+
+HTTP_CACHE = os.environ.get("HTTP_CACHE", "1") == "1"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+FAVICON_CACHE_CONTROL = "public, max-age=86400"  # The URL only changes with the version of 'Dash'.
+
+# Version and modification time within the filename of a component bundle, for instance 'dash_renderer.v4_4_1m1792329182.min.js'.
+FINGERPRINT = re.compile(r"\.v[\w-]+m[0-9a-f]+\.")
+
+
+class HttpCache:
+    def __init__(self, app, enabled=HTTP_CACHE):
+        self.app = app
+        self.enabled = enabled
+        self.entries = {}  # Endpoint -> {"identity": body, "gzip": ..., "br": ..., "etag": ..., "mimetype": ...}.
+        self._lock = threading.Lock()
+
+        prefix = app.config.routes_pathname_prefix
+        self.endpoints = {
+            prefix: prefix,  # Index page, the same for every page path.
+            prefix + "<path:path>": prefix,
+            prefix + "_dash-layout": prefix + "_dash-layout",
+            prefix + "_dash-dependencies": prefix + "_dash-dependencies",
+        }
+        self.component_prefix = prefix + "_dash-component-suites/"
+        self.assets_prefix = "{}{}/".format(prefix, app.config.assets_url_path.strip("/"))
+        self.favicon_path = prefix + "_favicon.ico"
+
+    def serialize(self, endpoint):
+        # Calls the view of 'Dash' itself, so the body is exactly what it would send. 'Dash' collects the assets and the
+        # callbacks on its first request, that has to happen first when the cache is built on start-up.
+        server = self.app.server
+        self.app._setup_server()
+        with server.test_request_context(endpoint):
+            response = server.make_response(server.view_functions[endpoint]())
+        body = response.get_data()
+        entry = {"identity": body, "etag": strong_etag(body), "mimetype": response.mimetype}
+        entry.update(compress_all(body))
+        return entry
+
+    def build(self):
+        for endpoint in set(self.endpoints.values()):
+            self.lookup(endpoint)
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+
+    def lookup(self, endpoint):
+        entry = self.entries.get(endpoint)
+        if entry is None:
+            entry = self.serialize(endpoint)
+            with self._lock:
+                self.entries[endpoint] = entry
+        return entry
+
+    def respond(self, endpoint):
+        entry = self.lookup(endpoint)
+        request = flask.request
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"), entry)
+        if etag_matches(request.headers.get("If-None-Match"), entry["etag"]):
+            response = flask.Response(status=304)
+        else:
+            response = flask.Response(entry[encoding], mimetype=entry["mimetype"])
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = encoded_etag(entry["etag"], encoding)
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        return response
+
+    def install(self, server):
+        @server.before_request
+        def serve_cached_document():
+            request = flask.request
+            if not self.enabled or request.method not in ("GET", "HEAD") or request.url_rule is None:
+                return None
+            endpoint = self.endpoints.get(request.url_rule.rule)
+            return None if endpoint is None else self.respond(endpoint)
+
+        @server.after_request
+        def set_cache_headers(response):
+            request = flask.request
+            if not self.enabled or request.method not in ("GET", "HEAD") or response.status_code != 200:
+                return response
+
+            path = request.path
+            if path.startswith(self.component_prefix) and FINGERPRINT.search(path):
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            elif path.startswith(self.assets_prefix) and "m" in request.args:
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL  # 'Dash' adds the modification time.
+            elif path == self.favicon_path:
+                response.headers["Cache-Control"] = FAVICON_CACHE_CONTROL
+            return response
@@ -0,0 +1,165 @@
+# Information:
+# Kiosk mode ('KIOSK=1'), for the open days where the kiosks lose the network regularly. The browser registers a service
+# worker ('kiosk/service-worker.js', served from '/service-worker.js' so it controls every page), which:
+# * precaches the index page, the bundles of 'Dash', the assets, the images of the pages and the root layout (in kiosk mode
+#   the pages are routed within the browser, so the root layout contains every static page),
+# * answers a page load and every static file from its cache (and refreshes the cache in the background),
+# * sends every callback to the server, after the requests that are still queued (so the server sees them in order),
+# * without network, answers the callbacks of the answers (dropdowns, radio items) from a table of responses that's computed
+#   on the server in advance ('add_offline_callback'), and queues those requests within IndexedDB,
+# * queues any other callback that fails for lack of network (for instance the marble answers or a program to check), and
+#   the batches of page views of the browser (see 'EventRecorder.install' within 'events.py'), and
+# * sends the queued requests in batches to '/kiosk/sync', where they are replayed for this session.
+# A student therefore can answer the questions without the network, and the server gets the answers before the result.
+# The result chart and the feedback on the small programs still need the server.
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import flask
+
+from events import PAGE_VIEWS_PATH, internal_client
+from session_store import SESSION_COOKIE_NAME, current_session_id
+
+KIOSK_MODE = os.environ.get("KIOSK", "0") == "1"
+KIOSK_SYNC_INTERVAL = float(os.environ.get("KIOSK_SYNC_INTERVAL", 10))  # Seconds between two batches of queued requests.
+KIOSK_SYNC_BATCH = 100  # Requests per batch, at most.
+
+SERVICE_WORKER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kiosk", "service-worker.js")
+
+# URLs within the index page: scripts, stylesheets and the favicon.
+RESOURCE_URL = re.compile(r'(?:src|href)="(/[^"]*)"')
+
+
+def request_key(body):
+    # Same key as 'request_key' within 'kiosk/service-worker.js': the output and the values of the inputs.
+    values = [item.get("value") for item in body["inputs"]]
+    return "{}|{}".format(body["output"], json.dumps(values, separators=(",", ":"), ensure_ascii=False))
+
+
+def image_urls(component, found=None):
+    # The 'src' of every image within a layout.
+    found = [] if found is None else found
+    if isinstance(component, (list, tuple)):
+        for child in component:
+            image_urls(child, found)
+    elif hasattr(component, "to_plotly_json"):
+        source = getattr(component, "src", None)
+        if isinstance(source, str) and source.startswith("/"):
+            found.append(source)
+        image_urls(getattr(component, "children", None), found)
+    return found
+
+
+class Kiosk:
+    def __init__(self, app, event_recorder, layouts, sync_interval=KIOSK_SYNC_INTERVAL):
+        self.app = app
+        self.event_recorder = event_recorder
+        self.layouts = layouts  # Function that returns every layout a student can see, for their images.
+        self.sync_interval = sync_interval
+        self.offline_callbacks = []  # (output, input, values) of the callbacks that are answered from the table.
+        self.prefix = app.config.routes_pathname_prefix
+        self._manifest = None
+        self._lock = threading.Lock()
+
+    def add_offline_callback(self, output, input_name, values):
+        # A callback with a single input, whose response only depends on that input (its writes are replayed later).
+        self.offline_callbacks.append((output, input_name, list(values)))
+        self.clear()
+
+    def clear(self):
+        self._manifest = None
+
+    # -------- MANIFEST -------- #
+
+    def precache_urls(self, client):
+        index = client.get(self.prefix).get_data(as_text=True)
+        urls = [self.prefix, self.prefix + "_dash-layout", self.prefix + "_dash-dependencies"]
+        urls += RESOURCE_URL.findall(index)
+        for layout in self.layouts():
+            urls += image_urls(layout)
+        return list(dict.fromkeys(urls))  # Without duplicates, in order.
+
+    def offline_responses(self, client):
+        # Every response of the offline callbacks, computed by 'Dash' itself (the writes of these requests are thrown away).
+        responses = {}
+        for output, input_name, values in self.offline_callbacks:
+            component_id, component_property = input_name.rsplit(".", 1)
+            output_id, output_property = output.rsplit(".", 1)
+            for value in values:
+                body = {
+                    "output": output,
+                    "outputs": {"id": output_id, "property": output_property},
+                    "inputs": [{"id": component_id, "property": component_property, "value": value}],
+                    "changedPropIds": [input_name],
+                    "state": [],
+                }
+                response = client.post(self.prefix + "_dash-update-component", json=body)
+                responses[request_key(body)] = {"status": response.status_code, "body": response.get_data(as_text=True)}
+        return responses
+
+    def manifest(self):
+        with self._lock:
+            if self._manifest is None:
+                client = internal_client(self.app.server)  # These requests are no students.
+                manifest = {
+                    "precache": self.precache_urls(client),
+                    "responses": self.offline_responses(client),
+                    "static_prefixes": [
+                        self.prefix + "_dash-component-suites/",
+                        "{}{}/".format(self.prefix, self.app.config.assets_url_path.strip("/")),
+                    ],
+                    "callback_path": self.prefix + "_dash-update-component",
+                    "page_views_path": self.prefix + PAGE_VIEWS_PATH,
+                    "sync_path": self.prefix + "kiosk/sync",
+                    "sync_interval": self.sync_interval,
+                }
+                with open(SERVICE_WORKER_FILE, encoding="utf-8") as script_file:
+                    source = script_file.read()
+                content = json.dumps(manifest, sort_keys=True)
+                manifest["version"] = hashlib.sha256((content + source).encode("utf-8")).hexdigest()[:16]
+                self._manifest = (manifest, "var KIOSK_MANIFEST = {};\n\n{}".format(json.dumps(manifest), source))
+            return self._manifest
+
+    # -------- SYNC -------- #
+
+    def replay(self, requests):
+        # The queued callback requests of one browser, as if they were sent now (within the session of the browser). A
+        # queued batch of page views is {"pages": [...]}, the body of 'PAGE_VIEWS_PATH'.
+        client = self.app.server.test_client()
+        cookie = "{}={}".format(SESSION_COOKIE_NAME, current_session_id())
+        replayed = failed = 0
+        for body in requests:
+            if isinstance(body, dict) and isinstance(body.get("pages"), list):
+                self.event_recorder.record_page_views(body["pages"])
+                replayed += 1
+                continue
+            if not isinstance(body, dict) or not isinstance(body.get("output"), str):
+                failed += 1
+                continue
+            response = client.post(self.prefix + "_dash-update-component", json=body, headers={"Cookie": cookie})
+            if response.status_code < 400:
+                replayed += 1
+            else:
+                failed += 1
+        return {"replayed": replayed, "failed": failed}
+
+    def install(self, server):
+        @server.route(self.prefix + "service-worker.js")
+        def serve_service_worker():
+            manifest, script = self.manifest()
+            response = flask.Response(script, mimetype="application/javascript")
+            response.headers["Cache-Control"] = "no-cache"  # The browser checks for a new version on every load.
+            response.headers["Service-Worker-Allowed"] = self.prefix
+            return response
+
+        @server.route(self.prefix + "kiosk/sync", methods=["POST"])
+        def sync_kiosk():
+            body = flask.request.get_json(silent=True)
+            requests = body.get("requests") if isinstance(body, dict) else None
+            if not isinstance(requests, list) or len(requests) > KIOSK_SYNC_BATCH:
+                flask.abort(400)
+            return flask.jsonify(self.replay(requests))
@@ -0,0 +1,240 @@
+// Service worker of the kiosk mode (see 'kiosk.py', which puts 'KIOSK_MANIFEST' in front of this script).
+// Static files and page loads come from the cache. Callbacks go to the server, after the queued requests so the server sees
+// them in order. Without network the callbacks of the answers come from the table of the manifest, and the requests that
+// must reach the server are queued within IndexedDB and sent in batches to 'KIOSK_MANIFEST.sync_path'.
+
+var CACHE_NAME = "saxion-kiosk-" + KIOSK_MANIFEST.version;
+var QUEUE_DATABASE = "saxion-kiosk";
+var QUEUE_STORE = "requests";
+var SYNC_BATCH = 100;  // Same as 'KIOSK_SYNC_BATCH' within 'kiosk.py'.
+
+// -------- QUEUE -------- //
+
+function open_queue() {
+    return new Promise(function (resolve, reject) {
+        var request = indexedDB.open(QUEUE_DATABASE, 1);
+        request.onupgradeneeded = function () {
+            request.result.createObjectStore(QUEUE_STORE, {autoIncrement: true});
+        };
+        request.onsuccess = function () { resolve(request.result); };
+        request.onerror = function () { reject(request.error); };
+    });
+}
+
+function queue_transaction(mode, work) {
+    return open_queue().then(function (database) {
+        return new Promise(function (resolve, reject) {
+            var transaction = database.transaction(QUEUE_STORE, mode);
+            var result = work(transaction.objectStore(QUEUE_STORE));
+            transaction.oncomplete = function () { resolve(result.value); };
+            transaction.onerror = function () { reject(transaction.error); };
+        });
+    });
+}
+
+function enqueue(body) {
+    return queue_transaction("readwrite", function (store) {
+        store.add(body);
+        return {};
+    }).then(function () {
+        notify_pages();
+    });
+}
+
+function read_batch() {
+    // The oldest requests: [[key, body], ...].
+    return queue_transaction("readonly", function (store) {
+        var result = {value: []};
+        store.openCursor().onsuccess = function (event) {
+            var cursor = event.target.result;
+            if (cursor && result.value.length < SYNC_BATCH) {
+                result.value.push([cursor.key, cursor.value]);
+                cursor.continue();
+            }
+        };
+        return result;
+    });
+}
+
+function remove(keys) {
+    return queue_transaction("readwrite", function (store) {
+        keys.forEach(function (key) { store.delete(key); });
+        return {};
+    });
+}
+
+function queue_size() {
+    return queue_transaction("readonly", function (store) {
+        var result = {value: 0};
+        store.count().onsuccess = function (event) { result.value = event.target.result; };
+        return result;
+    });
+}
+
+var syncing = null;
+
+function sync() {
+    // Sends batches until the queue is empty, or the server can't be reached (the requests stay queued). Resolves to
+    // whether the queue is empty.
+    if (syncing === null) {
+        syncing = read_batch().then(function send(batch) {
+            if (!batch.length) {
+                return;
+            }
+            return fetch(KIOSK_MANIFEST.sync_path, {
+                method: "POST",
+                headers: {"Content-Type": "application/json"},
+                body: JSON.stringify({requests: batch.map(function (item) { return item[1]; })}),
+            }).then(function (response) {
+                if (!response.ok && response.status !== 400) {
+                    throw new Error("Sync failed: " + response.status);
+                }
+                return remove(batch.map(function (item) { return item[0]; }));  // A rejected batch would never pass either.
+            }).then(read_batch).then(send);
+        }).then(function () {
+            return true;
+        }, function () {
+            return false;  // No network, the next attempt sends them.
+        }).then(function (empty) {
+            syncing = null;
+            notify_pages();
+            return empty;
+        });
+    }
+    return syncing;
+}
+
+function notify_pages() {
+    return queue_size().then(function (size) {
+        return self.clients.matchAll().then(function (clients) {
+            clients.forEach(function (client) { client.postMessage({queued: size}); });
+        });
+    });
+}
+
+// -------- RESPONSES -------- //
+
+function request_key(body) {
+    // Same key as 'request_key' within 'kiosk.py'.
+    return body.output + "|" + JSON.stringify(body.inputs.map(function (input) {
+        return input.value === undefined ? null : input.value;
+    }));
+}
+
+function after_queue(request) {
+    // The request goes to the server once the queued requests are there, so the marble answers or the chart never arrive
+    // before the answers they depend on. Rejects when the queue can't be sent.
+    return sync().then(function (empty) {
+        if (!empty) {
+            throw new Error("Queued requests are waiting for the network");
+        }
+        return fetch(request);
+    });
+}
+
+function answer_callback(request) {
+    return request.clone().json().then(function (body) {
+        var stored = KIOSK_MANIFEST.responses[request_key(body)];
+        return after_queue(request).catch(function () {
+            // No network: queued, and answered from the table when the response is known.
+            return enqueue(body).then(function () {
+                if (!stored) {
+                    return new Response(null, {status: 204});  // No update, the page stays as it is.
+                }
+                return new Response(stored.status === 204 ? null : stored.body, {
+                    status: stored.status,
+                    headers: {"Content-Type": "application/json"},
+                });
+            });
+        });
+    });
+}
+
+function send_page_views(request) {
+    // A batch of page views from 'assets/clientside.js', queued when the server can't be reached.
+    return request.clone().json().then(function (body) {
+        return after_queue(request).catch(function () {
+            return enqueue(body).then(function () {
+                return new Response(null, {status: 204});
+            });
+        });
+    });
+}
+
+function from_cache(request, cache_key) {
+    // The cached response right away (refreshed in the background), the network for anything that isn't cached yet.
+    return caches.open(CACHE_NAME).then(function (cache) {
+        return cache.match(cache_key || request, {ignoreVary: true}).then(function (cached) {
+            var fetched = fetch(request).then(function (response) {
+                if (response.ok) {
+                    cache.put(cache_key || request, response.clone());
+                }
+                return response;
+            });
+            if (cached) {
+                fetched.catch(function () {});
+                return cached;
+            }
+            return fetched;
+        });
+    });
+}
+
+function is_static(url) {
+    // Precached, or a bundle or asset (for instance the parts of 'Dash' that are only loaded when a page needs them).
+    return KIOSK_MANIFEST.precache.indexOf(url.pathname + url.search) >= 0 ||
+        KIOSK_MANIFEST.static_prefixes.some(function (prefix) { return url.pathname.indexOf(prefix) === 0; });
+}
+
+// -------- EVENTS -------- //
+
+self.addEventListener("install", function (event) {
+    event.waitUntil(caches.open(CACHE_NAME).then(function (cache) {
+        return cache.addAll(KIOSK_MANIFEST.precache);
+    }).then(function () {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener("activate", function (event) {
+    event.waitUntil(caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name.indexOf("saxion-kiosk-") === 0 && name !== CACHE_NAME;  // Caches of older versions.
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    }).then(function () {
+        return self.clients.claim();
+    }));
+});
+
+self.addEventListener("fetch", function (event) {
+    var request = event.request;
+    var url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (request.method === "POST" && url.pathname === KIOSK_MANIFEST.callback_path) {
+        event.respondWith(answer_callback(request));
+    } else if (request.method === "POST" && url.pathname === KIOSK_MANIFEST.page_views_path) {
+        event.respondWith(send_page_views(request));
+    } else if (request.method === "GET" && request.mode === "navigate") {
+        // Every page is the same index page, the browser routes the pages itself.
+        event.respondWith(from_cache(request, KIOSK_MANIFEST.precache[0]));
+    } else if (request.method === "GET" && is_static(url)) {
+        event.respondWith(from_cache(request));
+    }
+});
+
+self.addEventListener("message", function (event) {
+    if (event.data === "sync") {
+        event.waitUntil(sync());
+    }
+});
+
+self.addEventListener("sync", function (event) {
+    if (event.tag === "kiosk-sync") {
+        event.waitUntil(sync());
+    }
+});
@@ -0,0 +1,81 @@
+# Information:
+# Pre-serialized responses for the 'display_page' callback.
+# The layouts of the pages never change while the server runs, so every response is serialized (and compressed) once at
+# startup. A page change is then a dict lookup that sends ready-made bytes, instead of walking the whole component tree.
+
+import flask
+from plotly.io.json import to_json_plotly
+
+from compression import choose_encoding, compress_all, encoded_etag, etag_matches, strong_etag
+
+
+def serialize_response(output_id, output_property, value):
+    # Same JSON as 'Dash' sends for a callback with a single output.
+    return to_json_plotly({"multi": True, "response": {output_id: {output_property: value}}}).encode("utf-8")
+
+
+class LayoutCache:
+    def __init__(self, routes, fallback="/", output_id="container", output_property="children"):
+        self.routes = routes
+        self.fallback = fallback
+        self.output_id = output_id
+        self.output_property = output_property
+        self.enabled = True
+        self.entries = {}
+        self.on_respond = None  # Optional function, called with the pathname of every page that is sent.
+
+    def build(self):
+        entries = {}
+        for pathname, layout in self.routes.items():
+            body = serialize_response(self.output_id, self.output_property, layout)
+            entry = {
+                "identity": body,
+                "etag": strong_etag(body),
+            }
+            entry.update(compress_all(body))
+            entries[pathname] = entry
+        self.entries = entries
+
+    def clear(self):
+        self.entries = {}
+
+    def lookup(self, pathname):
+        if not self.entries:
+            self.build()  # Lazy start-up, the first page change builds the cache.
+        return self.entries.get(pathname) or self.entries[self.fallback]
+
+    def respond(self, pathname):
+        entry = self.lookup(pathname)
+        request = flask.request
+        if self.on_respond is not None:
+            self.on_respond(pathname)
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"), entry)
+        if etag_matches(request.headers.get("If-None-Match"), entry["etag"]):
+            response = flask.Response(status=304)
+        else:
+            response = flask.Response(entry[encoding], mimetype="application/json")
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+
+        response.headers["ETag"] = encoded_etag(entry["etag"], encoding)
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def install(self, server, routes_pathname_prefix="/"):
+        callback_path = routes_pathname_prefix + "_dash-update-component"
+        output = "{}.{}".format(self.output_id, self.output_property)
+
+        # Answer the page callback before 'Dash' does, all the other callbacks pass through.
+        @server.before_request
+        def serve_cached_layout():
+            request = flask.request
+            if not self.enabled or request.method != "POST" or request.path != callback_path:
+                return None
+
+            body = request.get_json(silent=True)  # Cached by 'Flask', so 'Dash' doesn't parse it twice.
+            if not isinstance(body, dict) or body.get("output") != output:
+                return None
+
+            inputs = body.get("inputs") or [{}]
+            return self.respond(inputs[0].get("value"))
@@ -8,12 +8,34 @@
 # Python is used for creating this webpages, due to the powerful aspects this programming language has.
 
 
+import os
+import time
+
+startup_started = time.perf_counter()  # Used to measure the import time of this script (see 'START-UP').
+
 # Imports for 'dash':
 import dash
-import pandas as pd
+import flask
 from dash import dcc
 from dash import html
-import plotly.express as px
+from plotly.io.json import to_json_plotly
+
+import asset_pipeline
+from adaptive import AdaptiveQuestionnaire
+from analytics import AnalyticsFeed
+from callback_analyzer import analyze, prune_dead_callbacks
+from charts import FIGURE_MODE, figure_cache, load_plotting
+from compression import ResponseCompressor
+from events import PAGE_VIEWS_PATH, create_event_recorder, internal_client
+from http_cache import HttpCache
+from kiosk import KIOSK_MODE, KIOSK_SYNC_INTERVAL, Kiosk
+from layout_cache import LayoutCache
+from metrics import CallbackMetrics
+from pages import STATIC_SITE, PageRegistry
+from profiler import SamplingProfiler
+from sandbox import cpp_pool, python_pool
+from scoring import create_scoring_engine, education_names, questions
+from session_store import create_session_store
 
 # -------- APPLICATION STYLESHEET -------- #
 
@@ -28,12 +50,35 @@ external_stylesheets = [
 
 # -------- APPLICATION SETUP -------- #
 
-initial_study_choice = str()  # Global variable, used for dynamic charts based on education. Used for simplicity.
+# 'eager': figures and serialized layouts are built while importing this script (the worker is slower to start).
+# 'lazy': 'pandas' and 'plotly' are imported, and figures and layouts are built, on first use or within 'warm_up'.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
+WARMUP = os.environ.get("WARMUP", "0") == "1"  # Run 'warm_up' before the worker accepts traffic.
 
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_callback_exceptions=True)
 server_run = app.server
+
+session_store = create_session_store()  # Answers of every student, used for dynamic charts based on education (see 'session_store.py').
+session_store.install(server_run)
+
+callback_metrics = CallbackMetrics()  # Calls, errors, latency and response size of every callback, shown at '/metrics'.
+callback_metrics.install(app)
+profiler = SamplingProfiler()  # Keeps a stack profile of every slow callback, see 'profiler.py' for the admin endpoints.
+profiler.install(app)
+
+event_recorder = create_event_recorder()  # Choices and progress of the students, written in the background (see 'events.py').
+analytics_feed = AnalyticsFeed()  # Live numbers of these events for the staff dashboard ('/staff').
+analytics_feed.install(server_run)
+
+scoring_engine = create_scoring_engine()  # Turns the answers of a student into a score for every education (see 'scoring.py').
 app.title = "Saxion - Get ready for a smart world!"
 
+asset_pipeline.install(app)  # Resized, fingerprinted images (if built), must be installed before the pages are created.
+http_cache = HttpCache(app)  # ETags and '304 Not Modified' for the index page, the root layout and the callbacks.
+http_cache.install(server_run)
+response_compressor = ResponseCompressor(app)  # gzip (or brotli) for the bundles, the assets and the callback responses.
+response_compressor.install(server_run)
+
 app.layout = html.Div(children=[
     html.Div(
         # Create a header for the application.
@@ -80,851 +125,366 @@ app.layout = html.Div(children=[
     ),
 ])
 
-page_index = html.Div(
-    children=[
-        html.H1(
-            "🏠 Home 🏠"
-        ),
-
-        html.Div(
-            html.P(
-                "You are probably faced with a difficult choice. Choosing a new education. But this gadget is guaranteed to help you further! It asks you a number of questions, and as a result of these questions you get small projects that have to do with different courses within Saxion."
-            ),
-        ),
-
-        html.Div(
-            html.P(
-                "So: do you want to know whether Applied Computer Science, Electrical and Electronic Engineering, Software Engineering, Mechatronics or Industrial Product Designing. Start the gadget now!"
-            ),
-        ),
-
-        html.A(
-            html.Button(
-                "Start the gadget!",
-                className="button",
-            ),
-            href="/page-1",
-        ),
-    ],
-    className="menu",
-)
-
-page_1_layout = html.Div(
-    children=[
-        html.H1(
-            "🔴 Who are you?! 🔴"
-        ),
-
-        html.P(
-            "In order to generate a better choice, we would like to know which education you did before. This allows us to make better questions for YOU :)"
-        ),
-
-        html.Div(
-            children=[
-                html.Div(
-                    id="Initial study choice:",
-                    className="menu-title",
-                ),
-
-                dcc.Dropdown(
-                    id="initial_high_school_filter",  # This identification can be used within a callback function (see 'CALLBACK_SECTION' within this script).
-                    options=[
-                        # All the values, the second one within this pair is used for recognition.
-                        {"label": "HAVO", "value": "HAVO_SAX"},
-                        {"label": "VWO", "value": "VWO_SAX"},
-                        {"label": "MBO", "value": "MBO_SAX"},
-                        # If MBO maybe ask more about previous education, like another tap with Mechatronics, EEE, ACS background
-
-                    ],
-                    placeholder="Select your previous education...",
-                    clearable=False,
-                    className="dropdown",
-                ),
-            ],
-        ),
-
-        html.P(
-            id="dropdown_high_school_text_notification",
-            className="user_text_notify",
-        ),
-
-        html.A(
-            html.Button(
-                    "Continue",
-                    id="dropdown_high_school_notification",
-                    className="button",
-                ),
-            href="/page-2",
-        ),
-    ],
-    className="menu",
-)
-
-page_2_layout = html.Div(
-    children=[
-        html.H1(
-            "🔴 Initial choice of your study 🔴!"
-        ),
-
-        html.P(
-            "In order to generate a better choice, we would like to know which study program you are interested in. This allows you to make a choice in the menu below, to continue next."
-        ),
-
-        html.Div(
-            children=[
-                html.Div(
-                    id="Initial study choice:",
-                    className="menu-title",
-                ),
-
-                dcc.Dropdown(
-                    id="initial_study_filter",  # This identification can be used within a callback function (see 'CALLBACK_SECTION' within this script).
-                    options=[
-                        # All the values, the second one within this pair is used for recognition.
-                        {"label": "Applied Computer Science", "value": "ACS_SAX"},
-                        {"label": "Electrical Electronic Engineering", "value": "EEE_SAX"},
-                        {"label": "Mechatronics", "value": "MT_SAX"},
-                        {"label": "Software Engineering", "value": "ICT_SAX"},
-                        {"label": "Industrial Product Design", "value": "IPO_SAX"},
-                        {"label": "I haven't a preference ", "value": "NONE_SAX"}
-
-                    ],
-                    placeholder="Select education...",
-                    clearable=False,
-                    className="dropdown",
-                ),
-            ],
-        ),
-
-        html.P(
-            id="dropdown_text_notification",
-            className="user_text_notify",
-        ),
-
-        html.A(
-            html.Button(
-                    "Continue",
-                    id="dropdown_notification",
-                    className="button",
-                ),
-            href="/page-3",
-        ),
-    ],
-    className="menu",
-)
-
-# Add more input for the user.
-page_3_layout = html.Div(
-    children=[
-        html.H1(
-            "Can you tell your interest?!"
-        ),
-
-        html.P(
-            "We want to now more about your initial interests! Do you like for instance creating web applications, like a real Amazon application, or do you want to know more about creating a real robot?"
-        ),
-
-        html.Div(
-            dcc.RadioItems(
-                options=[
-                    {"label": "Microcontrollers", "value": "MICRO_CONT_SAX"},
-                    {"label": "Robots", "value": "ROBOT_SAX"},
-                    {"label": "Printed Circuit Boards", "value": "PCB_SAX"},
-                    {"label": "Designing products for cars", "value": "PROD_DESIGN_SAX"}
-                ],
-            ),
-        ),
-
-        html.A(
-            html.Button(
-                    "Continue",
-                    id="dropdown_notification",
-                    className="button",
-                ),
-            href="/page-4",
-        ),
-    ],
-    className="menu",
-)
-
-page_4_layout = html.Div(
-    children=[
-        html.Div(
-            children=[
-                html.H1(
-                    "ℹ️️ Explanation of the game you'll play ℹ️!"
-                ),
-
-                html.Div(
-                    html.P(
-                        "In order to introduce you to the different courses within the Saxion in a playful and informative way, you will first have to deal with a small game. You use a marble that you can send in different directions, depending on the question that is being asked. To move the marble, different buttons are given below in the picture, so it can be moved to the left or to the right. After these questions have been answered, the courses that best match the given answers will be shown. This is followed by the second phase of this tool."
-                    )
-                ),
-                html.A(
-                    html.Button(
-                        "Continue",
-                        className="button",
-                    ),
-                    href="/page-5",
-                ),
-            ],
-        )
-    ],
-    className="menu",
-)
-
-page_5_layout = html.Div(
-    children=[
-        html.H1(
-            "🎮 Let's play the marble game 🎮!"
-        ),
-
-        html.Img(
-            # Question is: Do you like electronics?
-            src=app.get_asset_url("MARBLE_GAME_IMG.png"),
-            width="700",
-            height="600",
-        ),
-
-        html.Div(
-            children=[
-                html.A(
-                    html.Button(
-                        "Stop the game",
-                        className="button",
-                    ),
-                    href="/page-index",
-                ),
-                html.A(
-                    html.Button(
-                        "Continue",
-                        className="button",
-                    ),
-                    href="/page-6"
-                ),
-            ],
-        ),
-    ],
-    className="menu",
-)
-
-page_6_layout = html.Div(
-    children=[
-        html.H1(
-            "🎮 Let's play the marble game 🎮!"
-        ),
-
-        html.Img(
-            # Update picture: question about: (Do you like mechanics?)
-            src=app.get_asset_url("MARBLE_GAME_IMG_ONE.png"),
-            width="700",
-            height="600",
-        ),
-
-        html.Div(
-            children=[
-                html.A(
-                    html.Button(
-                        "Stop the game",
-                        className="button",
-                    ),
-                    href="/page-index",
-                ),
-                html.A(
-                    html.Button(
-                        "Continue",
-                        className="button",
-                    ),
-                    href="/page-7"
-                ),
-            ],
-        ),
-    ],
-    className="menu",
-)
-
-page_7_layout = html.Div(
-    children=[
-        html.H1(
-            "🎮 Let's play the marble game 🎮!"
-        ),
-
-        html.Img(
-            # Update question: Are you a more global person or do you want to focus on one thing specific?
-            src=app.get_asset_url("MARBLE_GAME_IMG_TWO.png"),
-            width="700",
-            height="600",
-        ),
-
-        html.Div(
-            children=[
-                html.A(
-                    html.Button(
-                        "Stop the game",
-                        className="button",
-                    ),
-                    href="/page-index",
-                ),
-                html.A(
-                    html.Button(
-                        "Continue",
-                        className="button",
-                    ),
-                    href="/page-8"
-                ),
-            ],
-        ),
-    ],
-    className="menu",
-)
-
-page_8_layout = html.Div(
-    children=[
-        html.H1(
-            "🎮 Let's play the marble game 🎮!"
-        ),
-
-        html.Img(
-            # Update question: Do you want to know more about: how components work or how to apply them?
-            src=app.get_asset_url("MARBLE_GAME_IMG_THREE.png"),
-            width="700",
-            height="600",
-        ),
-
-        html.Div(
-            children=[
-                html.A(
-                    html.Button(
-                        "Stop the game",
-                        className="button",
-                    ),
-                    href="/page-index",
-                ),
-                html.A(
-                    html.Button(
-                        "Continue",
-                        className="button",
-                    ),
-                    href="/page-9"
-                ),
-            ],
-        ),
-    ],
-    className="menu",
-)
-
-# If score [70, 95, 60, 80, 70] (so second score highest, go to Applied computer science game)
-# If score [95, 70, 60, 80, 70] (so first score highest, go to Electrical Engineering game)
-# But if I can see you made already something like that.
-
-page_9_layout = html.Div(
-    children=[
-        html.H1(
-            "📊 Result of the little marble game 📊!"
-        ),
-
-        html.P(
-            "Thanks for playing the game! We now have an idea of which field of study you really like. Based on this, in the next step you will carry out a small project related to your chosen study program."
-        ),
-
-        html.Div(
-            id="graph_container",
-        ),
-
-        html.P(
-            "You now have a general impression of which training suits you best. In this case it is {}, to which by pressing the next button you start a small simple project that introduces you further to this training.".format("Applied Computer Science")  # You see that this is hard coded, must change in definitive version.
-        ),
-
-        html.A(
-            html.Button(
-                "Continue",
-                className="button",
-            ),
-            href="/page-10",
-        ),
-    ],
-    className="menu"
-)
+# -------- WIDGETS -------- #
 
-# ACS (introduction)
-page_10_layout = html.Div(
-    children=[
-        html.H1(
-            "ℹ️ Explanation for the project (Applied Computer Science) ℹ️!"
-        ),
-
-        html.P(
-            "Everyone should start programming at some point. For this reason, the C++ programming language is often used at Saxion University of Applied Sciences, because it is applied to many embedded systems. For this reason, you are going to make a small computer program that every programmer at Saxion will start with! Your job is to say 'Hello Saxion!' on the computer screen."
-        ),
-
-        html.P(
-            "To run your program, press the 'Run' button on the next screen. You will then see the result of the program. If it doesn't work right away, don't worry! Modify the program until it runs."
-        ),
-
-        html.A(
-            html.Button(
-                "Start the small project",
-                className="button",
-            ),
-            href="/page-11",
-        ),
-    ],
-    className="menu",
-)
+# The questions of the marble game, every bin is an answer: [value (see 'questions' within 'scoring.py'), label].
+marble_questions = [
+    {"key": "marble_electronics", "question": "Do you like electronics?", "left": ["YES", "Yes"], "right": ["NO", "No"]},
+    {"key": "marble_mechanics", "question": "Do you like mechanics?", "left": ["YES", "Yes"], "right": ["NO", "No"]},
+    {"key": "marble_focus", "question": "Are you a more global person or do you want to focus on one thing specific?",
+     "left": ["GLOBAL", "Global"], "right": ["SPECIFIC", "Specific"]},
+    {"key": "marble_components", "question": "Do you want to know more about: how components work or how to apply them?",
+     "left": ["HOW", "How they work"], "right": ["APPLY", "How to apply them"]},
+]
 
-# Game ACS
-page_11_layout = html.Div(
-    html.Div(
+# The text of every page is within 'pages.json' (see 'pages.py'), these are the interactive parts the pages refer to by name.
+# The ids are used within the callbacks (see 'CALLBACKS' within this script).
+widgets = {
+    "high_school_dropdown": html.Div(
         children=[
-            html.H1(
-                "Project Applied Computer Science"
-            ),
-
-            html.P(
-                "It looks like you want to learn more about what Applied Computer Science has to offer. Here you are now dealing with a simple project that delves further into the topic.",
-            ),
-
             html.Div(
                 children=[
-                    html.A(
-                        html.Button(
-                            "Run",
-                            id="run_program_button",
-                            className="code_run_button",
-                            n_clicks=0,
-                        ),
+                    html.Div(
+                        id="Initial study choice:",
+                        className="menu-title",
                     ),
 
-                    html.Div(
-                        children=[
-                            dcc.Textarea(
-                                id="input_box_coding",
-                                value="#include <iostream>\n\nint main() {\n\t// Add some code here! Remove the '//' to put your code there.\n\treturn 0;\n}",  # The initial value for the small project.
-                                className="code_input_box",
-                            ),
-
-                            html.P(
-                                id="input_coding_text_area",
-                                className="user_text_notify",
-                            ),
-
-                            html.P(
-                                "Do you have any questions? Don't worry! You can ask them within the 'IntoSaxion' environment to real students for this education. How nice is that!"
-                            ),
+                    dcc.Dropdown(
+                        id="initial_high_school_filter",
+                        options=[
+                            # All the values, the second one within this pair is used for recognition.
+                            {"label": "HAVO", "value": "HAVO_SAX"},
+                            {"label": "VWO", "value": "VWO_SAX"},
+                            {"label": "MBO", "value": "MBO_SAX"},
+                            # If MBO maybe ask more about previous education, like another tap with Mechatronics, EEE, ACS background
                         ],
+                        placeholder="Select your previous education...",
+                        clearable=False,
+                        className="dropdown",
                     ),
                 ],
             ),
 
-            html.A(
-                html.Button(
-                    "To other project",
-                    className="button",
-                ),
-                href="/page-12",
+            html.P(
+                id="dropdown_high_school_text_notification",
+                className="user_text_notify",
             ),
         ],
     ),
-    className="menu",
-)
-
-#  EEE (introduction)
-page_12_layout = html.Div(
-    children=[
-        html.H1(
-            "ℹ️ Explanation for the project (Electrical Engineering) ℹ️!"
-        ),
 
-        html.P(
-            "The basis of electrical engineering is the design of various electronic circuits. For this you use a special program on the computer, in order to be able to design your own printed circuit board. This is something that almost every electrical engineering student at Saxion does!"
-        ),
-
-        html.P(
-            "You will be designing a printed circuit board. A simple tool is used for this, which converts your circuit. You can start drawing 'lines' to let this go to various components. Ultimately it is even possible to consult a real 3D design of the PCB (printed circuit board)!"
-        ),
-
-        html.A(
-            html.Button(
-                "Start the small project",
-                className="button",
-            ),
-            href="/page-13",
-        ),
-    ],
-    className="menu",
-)
-
-# Game EEE
-page_13_layout = html.Div(
-    html.Div(
+    "study_dropdown": html.Div(
         children=[
-            html.H1(
-                "Project Electrical Engineering"
-            ),
-
-            html.P(
-                "It looks like you want to learn more about what EEE has to offer. Here you are now dealing with a simple project that delves further into the topic.",
-            ),
-
             html.Div(
                 children=[
                     html.Div(
-                        children=[
-                            html.Img(
-                                src=app.get_asset_url("PROJECT_EEE.png"),
-                                width="700",
-                                height="400",
-                            ),
-
-                            html.P(
-                                "Do you have any questions? Don't worry! You can ask them within the 'IntoSaxion' environment to real students for this education. How nice is that!"
-                            ),
+                        id="Initial study choice:",
+                        className="menu-title",
+                    ),
+
+                    dcc.Dropdown(
+                        id="initial_study_filter",
+                        options=[
+                            # All the values, the second one within this pair is used for recognition.
+                            {"label": "Applied Computer Science", "value": "ACS_SAX"},
+                            {"label": "Electrical Electronic Engineering", "value": "EEE_SAX"},
+                            {"label": "Mechatronics", "value": "MT_SAX"},
+                            {"label": "Software Engineering", "value": "ICT_SAX"},
+                            {"label": "Industrial Product Design", "value": "IPO_SAX"},
+                            {"label": "I haven't a preference ", "value": "NONE_SAX"}
                         ],
+                        placeholder="Select education...",
+                        clearable=False,
+                        className="dropdown",
                     ),
                 ],
             ),
 
-            html.A(
-                html.Button(
-                    "To other project",
-                    className="button",
-                ),
-                href="/page-14",
+            html.P(
+                id="dropdown_text_notification",
+                className="user_text_notify",
             ),
         ],
     ),
-    className="menu",
-)
-
-# Mechatronics (introduction)
-page_14_layout = html.Div(
-    children=[
-        html.H1(
-            "ℹ️ Explanation for the project (Mechatronics) ℹ️!"
-        ),
-
-        html.P(
-            "Your job as student of Mechatronic is to combine electronic and mechanic parts to make a moving system! In this game you see an project you will make in the 1e year and you have to make the right choice of components that are inside the project. "
-        ),
 
-        html.A(
-            html.Button(
-                "Start the small project",
-                className="button",
-            ),
-            href="/page-15",
+    "interest_radio": html.Div(
+        dcc.RadioItems(
+            id="initial_interest_filter",
+            options=[
+                {"label": "Microcontrollers", "value": "MICRO_CONT_SAX"},
+                {"label": "Robots", "value": "ROBOT_SAX"},
+                {"label": "Printed Circuit Boards", "value": "PCB_SAX"},
+                {"label": "Designing products for cars", "value": "PROD_DESIGN_SAX"}
+            ],
         ),
-    ],
-    className="menu",
-)
+    ),
 
-# Game Mechatronics
-page_15_layout = html.Div(
-    html.Div(
+    # The game runs within the browser (see 'assets/clientside.js'), the answers are sent to the server after the last one.
+    "marble_game": html.Div(
         children=[
-            html.H1(
-                "Project Mechatronics"
+            html.P(
+                id="marble_question",
+                className="menu-title",
             ),
 
-            html.P(
-                "It looks like you want to learn more about what Mechatronics has to offer. Here you are now dealing with a simple project that delves further into the topic.",
+            html.Canvas(
+                id="marble_canvas",
+                width="700",
+                height="400",
             ),
 
             html.Div(
                 children=[
-                    html.Div(
-                        children=[
-                            html.Img(
-                                src=app.get_asset_url("PROJECT_MT.png"),
-                                width="700",
-                                height="400",
-                            ),
-
-                            html.P(
-                                "Do you have any questions? Don't worry! You can ask them within the 'IntoSaxion' environment to real students for this education. How nice is that!"
-                            ),
-                        ],
+                    html.Button(
+                        "⬅️ Left",
+                        id="marble_left",
+                        className="button",
+                    ),
+                    html.Button(
+                        "Right ➡️",
+                        id="marble_right",
+                        className="button",
                     ),
                 ],
             ),
 
-            html.A(
-                html.Button(
-                    "To other project",
-                    className="button",
-                ),
-                href="/page-16",
-            ),
+            dcc.Store(id="marble_questions", data=marble_questions),
+            dcc.Store(id="marble_answers"),  # Filled in by the browser after the last question.
         ],
     ),
-    className="menu",
-)
-
-# IPO (introduction)
-page_16_layout = html.Div(
-    children=[
-        html.H1(
-            "ℹ️ Explanation for the project (Industrial Product Design) ℹ️!"
-        ),
-
-        html.P(
-            "You will now start designing a simple component, which students at IPO do very often! For this you will work with a real program in which basic components are developed. You already have a basic design, as a result of this you can add a number of things to the initial design, so that you can make your own design!"
-        ),
-
-        html.A(
-            html.Button(
-                "Start the small project",
-                className="button",
-            ),
-            href="/page-17",
-        ),
-    ],
-    className="menu",
-)
 
-# Game IPO
-page_17_layout = html.Div(
-    html.Div(
+    # If score [70, 95, 60, 80, 70] (so second score highest, go to Applied computer science game)
+    # If score [95, 70, 60, 80, 70] (so first score highest, go to Electrical Engineering game)
+    "result_chart": html.Div(
         children=[
-            html.H1(
-                "Project Industrial Product Design"
+            html.Div(
+                id="graph_container",
             ),
 
             html.P(
-                "It looks like you want to learn more about what IPO has to offer. Here you are now dealing with a simple project that delves further into the topic.",
-            ),
-
-            html.Div(
-                children=[
-                    html.Div(
-                        children=[
-                            html.Img(
-                                src=app.get_asset_url("PROJECT_IPO.png"),
-                                width="700",
-                                height="400",
-                            ),
-
-                            html.P(
-                                "Do you have any questions? Don't worry! You can ask them within the 'IntoSaxion' environment to real students for this education. How nice is that!"
-                            ),
-                        ],
-                    ),
-                ],
+                id="result_text",  # Filled in by 'show_chart', based on the answers of the student.
             ),
+        ],
+    ),
 
+    "cpp_editor": html.Div(
+        children=[
             html.A(
                 html.Button(
-                    "To other project",
-                    className="button",
+                    "Run",
+                    id="run_program_button",
+                    className="code_run_button",
+                    n_clicks=0,
                 ),
-                href="/page-18",
             ),
-        ],
-    ),
-    className="menu",
-)
 
-# Software Engineering (introduction)
-page_18_layout = html.Div(
-    children=[
-        html.H1(
-            "ℹ️ Explanation for the project (Software Engineering) ℹ️!"
-        ),
+            html.Div(
+                children=[
+                    dcc.Textarea(
+                        id="input_box_coding",
+                        value="#include <iostream>\n\nint main() {\n\t// Add some code here! Remove the '//' to put your code there.\n\treturn 0;\n}",  # The initial value for the small project.
+                        className="code_input_box",
+                    ),
 
-        html.P(
-            "Everyone should start programming at some point. For this reason, the Python programming language is often used at Saxion University of Applied Sciences, because it is applied to many computer applications. For this reason, you are going to make a small computer program that every programmer at Saxion will start with! Your job is to say 'Hello Saxion!' on the computer screen."
-        ),
+                    html.P(
+                        id="input_coding_text_area",
+                        className="user_text_notify",
+                    ),
 
-        html.P(
-            "To run your program, press the 'Run' button on the next screen. You will then see the result of the program. If it doesn't work right away, don't worry! Modify the program until it runs."
-        ),
+                    dcc.Store(
+                        id="code_submission",  # Filled in by the browser after 'Run'.
+                    ),
 
-        html.A(
-            html.Button(
-                "Start the small project",
-                className="button",
+                    dcc.Interval(
+                        id="code_poll",  # Asks for the result of the compiler, only enabled while the program is compiled.
+                        interval=250,
+                        disabled=True,
+                    ),
+                ],
             ),
-            href="/page-19",
-        ),
-    ],
-    className="menu",
-)
+        ],
+    ),
 
-# Game Software Engineering
-page_19_layout = html.Div(
-    html.Div(
+    "python_editor": html.Div(
         children=[
-            html.H1(
-                "Project Software Engineering "
-            ),
-
-            html.P(
-                "It looks like you want to learn more about what Software Engineering has to offer. Here you are now dealing with a simple project that delves further into the topic.",
+            html.A(
+                html.Button(
+                    "Run",
+                    id="run_program_button_software_engineering",
+                    className="code_run_button",
+                    n_clicks=0,
+                ),
             ),
 
             html.Div(
                 children=[
-                    html.A(
-                        html.Button(
-                            "Run",
-                            id="run_program_button_software_engineering",
-                            className="code_run_button",
-                            n_clicks=0,
-                        ),
+                    dcc.Textarea(
+                        id="input_box_coding_software_engineering",
+                        value="if __name__ == \"__main__\":\n\t# Print here \"Hello, Saxion!\"",  # The initial value for the small project.
+                        className="code_input_box",
                     ),
 
-                    html.Div(
-                        children=[
-                            dcc.Textarea(
-                                id="input_box_coding_software_engineering",
-                                value="if __name__ == \"__main__\":\n\t# Print here \"Hello, Saxion!\"",  # The initial value for the small project.
-                                className="code_input_box",
-                            ),
-
-                            html.P(
-                                id="input_coding_text_area_software_engineering",
-                                className="user_text_notify",
-                            ),
-
-                            html.P(
-                                "Do you have any questions? Don't worry! You can ask them within the 'IntoSaxion' environment to real students for this education. How nice is that!"
-                            ),
-                        ],
+                    html.P(
+                        id="input_coding_text_area_software_engineering",
+                        className="user_text_notify",
                     ),
-                ],
-            ),
 
-            html.A(
-                html.Button(
-                    "To fun facts",
-                    className="button",
-                ),
-                href="/page-20",
+                    dcc.Store(
+                        id="code_submission_software_engineering",  # Filled in by the browser after 'Run'.
+                    ),
+
+                    dcc.Interval(
+                        id="code_poll_software_engineering",  # Asks for the result of the program, only enabled while it runs.
+                        interval=250,
+                        disabled=True,
+                    ),
+                ],
             ),
         ],
     ),
-    className="menu",
-)
 
-page_20_layout = html.Div(
-    children=[
-        html.H1(
-            "⁉️ FUN FACTS ⁉️"
-        ),
-
-        html.Div(
+    "staff_dashboard": html.Div(
+        children=[
             html.P(
-                "Did you know that:"
+                "Live numbers of the students of today, these are updated automatically.",
+                id="staff_status",
             ),
-        ),
 
-        html.Div(
-            html.P(
-                "Saxion provides a lot of international educations? A lot is internationally focussed, good for later in business!"
-            ),
-        ),
+            html.H2("Chosen studies per prior education"),
+            html.Div(id="staff_studies"),
 
-        html.A(
-            html.Button(
-                "Start the gadget!",
-                className="button",
-            ),
-            href="/page-index",
-        ),
-    ],
-    className="menu",
-)
+            html.H2("Students per page"),
+            html.Div(id="staff_pages"),
+
+            html.H2("Coding projects"),
+            html.Div(id="staff_projects"),
+
+            # The numbers are pushed by the server (see 'analytics.py'), the browser renders them (see 'assets/clientside.js').
+            dcc.Store(id="staff_stream", data=app.config.requests_pathname_prefix + "staff/stream"),
+            dcc.Store(id="staff_data"),
+        ],
+    ),
+}
+
+# Compiled to layouts on first use, reloaded when 'pages.json' changes (see 'pages.py').
+page_registry = PageRegistry(widgets, app.get_asset_url)
+page_registry.install(server_run)
+
+# -------- ROUTING -------- #
+
+# 'server': every page change asks the 'display_page' callback for the layout.
+# 'client': all the static layouts are sent once, the browser switches pages by itself (see 'assets/clientside.js'). The
+# default in kiosk mode, where a page change has to work without the network.
+ROUTING_MODE = os.environ.get("ROUTING_MODE", "client" if KIOSK_MODE else "server")
+
+if ROUTING_MODE == "client":
+    # Serialized once (and again when 'pages.json' changes), the browser parses a fresh copy for every page change. Pages with
+    # data (for instance '/page-9' and the code pages) still use their own callbacks, so only those pages hit the server.
+    static_layouts = dcc.Store(id="static_layouts")
+    app.layout.children.append(static_layouts)
+
+    def serialize_static_layouts():
+        # 'Dash' serializes 'app.layout' for every new browser, so a new browser gets the new pages.
+        static_layouts.data = {path: to_json_plotly(layout) for path, layout in page_registry.items()}
+
+    serialize_static_layouts()
+    page_registry.on_reload.append(serialize_static_layouts)
+
+    app.clientside_callback(
+        dash.dependencies.ClientsideFunction(namespace="saxion", function_name="display_page"),
+        dash.dependencies.Output("container", "children"),
+        [dash.dependencies.Input("url", "pathname")],
+        [dash.dependencies.State("static_layouts", "data")],
+    )
+
+    # The page change itself doesn't reach the server. The browser collects the pages that are shown, and sends them in
+    # batches (see 'record_page_view' within 'assets/clientside.js' and 'EventRecorder.install').
+    event_recorder.install(server_run, app.config.routes_pathname_prefix)
+    app.layout.children.append(dcc.Store(id="page_view", data={"url": app.config.routes_pathname_prefix + PAGE_VIEWS_PATH}))
+    app.clientside_callback(
+        dash.dependencies.ClientsideFunction(namespace="saxion", function_name="record_page_view"),
+        dash.dependencies.Output("page_view", "data"),
+        [dash.dependencies.Input("url", "pathname")],
+        [dash.dependencies.State("page_view", "data")],
+    )
+
+
+# 'adaptive': the next question is the most informative one, and the questions stop when the result is clear (see
+# 'adaptive.py'). The policy is sent once to the browser, which chooses the 'Continue' links by itself.
+# 'fixed': every student answers all the questions, in the order of 'pages.json'.
+QUESTION_ORDER = os.environ.get("QUESTION_ORDER", "adaptive")
+
+# The page of every question (a marble question starts with the explanation of the game), and the page of the result.
+question_pages = {
+    "initial_high_school_choice": "/page-1",
+    "initial_study_choice": "/page-2",
+    "initial_interest_choice": "/page-3",
+}
+question_pages.update({question["key"]: "/page-4" for question in marble_questions})
+marble_game_page = "/page-5"
+result_page = "/page-9"
+
+questionnaire = AdaptiveQuestionnaire(scoring_engine)
+
+if QUESTION_ORDER == "adaptive":
+    app.layout.children += [
+        dcc.Store(id="adaptive_policy", data={
+            "tree": questionnaire.policy(),
+            "pages": question_pages,
+            "game": marble_game_page,
+            "result": result_page,
+        }),
+        # Answers of the question pages, kept by the browser. With 'STATIC_SITE=1' every link to a static page is a full
+        # page load, so the answers are kept within the session storage of the tab (the exported '/' removes them).
+        dcc.Store(id="adaptive_answers", data={}, storage_type="session" if STATIC_SITE else "memory"),
+    ]
+
+
+def next_page(answers):
+    # Same choice as 'next_page' within 'assets/clientside.js'.
+    key = questionnaire.next_question(answers)
+    if key is None:
+        return result_page
+    if key.startswith("marble_") and any(answered.startswith("marble_") and answers[answered] for answered in answers):
+        return marble_game_page  # The game is already explained.
+    return question_pages[key]
+
+
+def reachable_layouts():
+    # Every layout a student can see, used to find callbacks that can never be called (see 'callback_analyzer.py').
+    return [app.layout] + [layout for path, layout in page_registry.items()]
+
+
+def known_score_vectors():
+    # Scores of all the known study choices (and of no answers at all), the most common figures.
+    answers_list = [{}] + [{"initial_study_choice": choice} for choice in dict(questions)["initial_study_choice"]]
+    return [tuple(int(round(score)) for score in scores) for scores in scoring_engine.score_batch(answers_list)]
+
+
+# Every 'display_page' response is serialized once, a page change then sends ready-made (compressed) bytes.
+layout_cache = LayoutCache(page_registry, fallback=page_registry.fallback)
+page_registry.on_reload.append(layout_cache.clear)  # Built again on the next page change.
+page_registry.on_reload.append(http_cache.clear)  # The root layout contains the pages in client mode.
+layout_cache.on_respond = lambda pathname: event_recorder.record("page_view", pathname)  # Progress of the student.
+
+if ROUTING_MODE == "server" and os.environ.get("LAYOUT_CACHE", "1") == "1":
+    layout_cache.install(server_run, app.config.routes_pathname_prefix)
+
+if STARTUP_MODE == "eager":
+    # The figures of all the known study choices are built before the first student arrives.
+    figure_cache.warm(known_score_vectors())
+    layout_cache.build()
 
 # -------- CALLBACKS -------- #
 
 
-@app.callback(dash.dependencies.Output("page-1-content", "children"),
-              [dash.dependencies.Input("page-1-content", "value")])
-@app.callback(dash.dependencies.Output("page-2-content", "children"),
-              [dash.dependencies.Input("page-2-content", "value")])
-@app.callback(dash.dependencies.Output("page-3-content", "children"),
-              [dash.dependencies.Input("page-3-content", "value")])
-@app.callback(dash.dependencies.Output("page-4-content", "children"),
-              [dash.dependencies.Input("page-4-content", "value")])
-@app.callback(dash.dependencies.Output("page-5-content", "children"),
-              [dash.dependencies.Input("page-5-content", "value")])
-@app.callback(dash.dependencies.Output("page-6-content", "children"),
-              [dash.dependencies.Input("page-6-content", "value")])
-@app.callback(dash.dependencies.Output("page-7-content", "children"),
-              [dash.dependencies.Input("page-7-content", "value")])
-@app.callback(dash.dependencies.Output("page-8-content", "children"),
-              [dash.dependencies.Input("page-8-content", "value")])
-@app.callback(dash.dependencies.Output("page-9-content", "children"),
-              [dash.dependencies.Input("page-9-content", "value")])
-@app.callback(dash.dependencies.Output("page-10-content", "children"),
-              [dash.dependencies.Input("page-10-content", "value")])
-@app.callback(dash.dependencies.Output("page-11-content", "children"),
-              [dash.dependencies.Input("page-11-content", "value")])
-@app.callback(dash.dependencies.Output("page-12-content", "children"),
-              [dash.dependencies.Input("page-12-content", "value")])
-@app.callback(dash.dependencies.Output("page-13-content", "children"),
-              [dash.dependencies.Input("page-13-content", "value")])
-@app.callback(dash.dependencies.Output("page-14-content", "children"),
-              [dash.dependencies.Input("page-14-content", "value")])
-@app.callback(dash.dependencies.Output("page-15-content", "children"),
-              [dash.dependencies.Input("page-15-content", "value")])
-@app.callback(dash.dependencies.Output("page-16-content", "children"),
-              [dash.dependencies.Input("page-16-content", "value")])
-@app.callback(dash.dependencies.Output("page-17-content", "children"),
-              [dash.dependencies.Input("page-17-content", "value")])
-@app.callback(dash.dependencies.Output("page-18-content", "children"),
-              [dash.dependencies.Input("page-18-content", "value")])
-@app.callback(dash.dependencies.Output("page-19-content", "children"),
-              [dash.dependencies.Input("page-19-content", "value")])
-@app.callback(dash.dependencies.Output("page-20-content", "children"),
-              [dash.dependencies.Input("page-20-content", "value")])
-@app.callback(dash.dependencies.Output("container", "children"),
-              [dash.dependencies.Input("url", "pathname")])
 def display_page(pathname):
-    if pathname == '/page-1':
-        return page_1_layout
-    elif pathname == "/page-2":
-        return page_2_layout
-    elif pathname == "/page-3":
-        return page_3_layout
-    elif pathname == "/page-4":
-        return page_4_layout
-    elif pathname == "/page-5":
-        return page_5_layout
-    elif pathname == "/page-6":
-        return page_6_layout
-    elif pathname == "/page-7":
-        return page_7_layout
-    elif pathname == "/page-8":
-        return page_8_layout
-    elif pathname == "/page-9":
-        return page_9_layout
-    elif pathname == "/page-10":
-        return page_10_layout
-    elif pathname == "/page-11":
-        return page_11_layout
-    elif pathname == "/page-12":
-        return page_12_layout
-    elif pathname == "/page-13":
-        return page_13_layout
-    elif pathname == "/page-14":
-        return page_14_layout
-    elif pathname == "/page-15":
-        return page_15_layout
-    elif pathname == "/page-16":
-        return page_16_layout
-    elif pathname == "/page-17":
-        return page_17_layout
-    elif pathname == "/page-18":
-        return page_18_layout
-    elif pathname == "/page-18":
-        return page_18_layout
-    elif pathname == "/page-19":
-        return page_19_layout
-    elif pathname == "/page-20":
-        return page_20_layout
-    else:
-        return page_index
+    event_recorder.record("page_view", pathname)  # Only reached without the layout cache, see 'layout_cache.on_respond'.
+    return page_registry.get(pathname) or page_registry.get(page_registry.fallback)
+
+
+if ROUTING_MODE == "server":
+    app.callback(dash.dependencies.Output("container", "children"),
+                 [dash.dependencies.Input("url", "pathname")])(display_page)
 
 
 @app.callback(dash.dependencies.Output("dropdown_notification", "disabled"),
@@ -945,9 +505,24 @@ def notify_user_high_school_dropdown(value):
         return False
 
 
+@app.callback(dash.dependencies.Output("interest_notification", "disabled"),
+              [dash.dependencies.Input("initial_interest_filter", "value")])
+def notify_user_interest_radio(value):
+    session_store.set("initial_interest_choice", value)
+    event_recorder.record("interest", value)
+
+    if value is None:
+        return True
+    else:
+        return False
+
+
 @app.callback(dash.dependencies.Output("dropdown_high_school_text_notification", "children"),
               [dash.dependencies.Input("initial_high_school_filter", "value")])
-def notify_user_dropdown(value):
+def notify_user_high_school_choice(value):
+    session_store.set("initial_high_school_choice", value)
+    event_recorder.record("high_school", value)
+
     match value:
         case "HAVO_SAX":
             return "Your choice: {}.".format("HAVO")
@@ -961,9 +536,9 @@ def notify_user_dropdown(value):
 
 @app.callback(dash.dependencies.Output("dropdown_text_notification", "children"),
               [dash.dependencies.Input("initial_study_filter", "value")])
-def notify_user_dropdown(value):
-    global initial_study_choice
-    initial_study_choice = value
+def notify_user_study_choice(value):
+    session_store.set("initial_study_choice", value)
+    event_recorder.record("study", value)
 
     match value:
         case "ACS_SAX":
@@ -982,106 +557,360 @@ def notify_user_dropdown(value):
             return "No choice made! Button disabled, please select an education."
 
 
-@app.callback(dash.dependencies.Output("input_coding_text_area", "children"),
-              [dash.dependencies.Input("input_box_coding", "value"),
-               dash.dependencies.Input("run_program_button", "n_clicks")])
-def validate_code(value, n_clicks):
-    # Check for button presses, will be greater than one after a click. Could be improved, but just as a prototype (compare strings).
-    if n_clicks >= 1:
-        if "std::cout << \"Hello, Saxion!\" << std::endl;" in value:
+# 'Run' sends the program to the server (see 'check_code' within 'assets/clientside.js'), which compiles and runs it within
+# the sandbox. Only without a sandbox the feedback is based on comparing strings, see 'cpp_rules' and 'python_rules'.
+app.clientside_callback(
+    dash.dependencies.ClientsideFunction(namespace="saxion", function_name="check_cpp_code"),
+    [dash.dependencies.Output("input_coding_text_area", "children"),
+     dash.dependencies.Output("code_submission", "data")],
+    [dash.dependencies.Input("run_program_button", "n_clicks")],
+    [dash.dependencies.State("input_box_coding", "value")],
+)
+
+app.clientside_callback(
+    dash.dependencies.ClientsideFunction(namespace="saxion", function_name="check_python_code"),
+    [dash.dependencies.Output("input_coding_text_area_software_engineering", "children"),
+     dash.dependencies.Output("code_submission_software_engineering", "data")],
+    [dash.dependencies.Input("run_program_button_software_engineering", "n_clicks")],
+    [dash.dependencies.State("input_box_coding_software_engineering", "value")],
+)
+
+
+app.clientside_callback(
+    dash.dependencies.ClientsideFunction(namespace="saxion", function_name="play_marble_game"),
+    dash.dependencies.Output("marble_question", "children"),
+    [dash.dependencies.Input("marble_questions", "data")],
+    [dash.dependencies.State("adaptive_policy", "data"),
+     dash.dependencies.State("adaptive_answers", "data")] if QUESTION_ORDER == "adaptive" else [],
+)
+
+if QUESTION_ORDER == "adaptive":
+    # The browser walks the policy along the answers, a page change doesn't wait for the server. Every question is on
+    # its own page, so every question has its own callback ('Dash' only calls a callback when all its inputs are shown).
+    app.clientside_callback(
+        dash.dependencies.ClientsideFunction(namespace="saxion", function_name="forget_answers"),
+        dash.dependencies.Output("adaptive_answers", "data", allow_duplicate=True),
+        [dash.dependencies.Input("url", "pathname")],
+        prevent_initial_call=True,
+    )
+    for input_id in ["initial_high_school_filter", "initial_study_filter", "initial_interest_filter"]:
+        app.clientside_callback(
+            dash.dependencies.ClientsideFunction(namespace="saxion", function_name="remember_answer"),
+            dash.dependencies.Output("adaptive_answers", "data", allow_duplicate=True),
+            [dash.dependencies.Input(input_id, "value")],
+            [dash.dependencies.State("adaptive_answers", "data")],
+            prevent_initial_call=True,
+        )
+
+    app.clientside_callback(
+        dash.dependencies.ClientsideFunction(namespace="saxion", function_name="choose_next_page"),
+        dash.dependencies.Output("next_question_link", "href"),
+        [dash.dependencies.Input("adaptive_answers", "data")],
+        [dash.dependencies.State("adaptive_policy", "data")],
+    )
+
+
+def walk_answers(adaptive_answers):
+    # The answers of the current walk. The adaptive questionnaire skips questions, so the session may still hold answers of
+    # an earlier walk within the same browser: the answers the browser kept for this walk are used instead.
+    if QUESTION_ORDER != "adaptive":
+        return session_store.get_all()
+    options = dict(questions)
+    return {key: value for key, value in (adaptive_answers or {}).items() if value in options.get(key, [])}
+
+
+@app.callback(dash.dependencies.Output("url", "pathname"),
+              [dash.dependencies.Input("marble_answers", "data")],
+              [dash.dependencies.State("adaptive_answers", "data")] if QUESTION_ORDER == "adaptive" else [],
+              prevent_initial_call=True)
+def submit_marble_answers(answers, adaptive_answers=None):
+    # All the answers of the marble game in one request, then straight on to the next question or the result.
+    options = dict(questions)
+    answers = {key: value for key, value in (answers or {}).items() if key.startswith("marble_") and value in options.get(key, [])}
+    session_store.update(answers)
+    event_recorder.record("marble", answers)
+    if QUESTION_ORDER == "adaptive":
+        return next_page(dict(walk_answers(adaptive_answers), **answers))
+    return result_page
+
+
+# The staff dashboard listens to the server-sent events of 'analytics_feed', and renders every update within the browser.
+app.clientside_callback(
+    dash.dependencies.ClientsideFunction(namespace="saxion", function_name="listen_to_staff_stream"),
+    dash.dependencies.Output("staff_status", "children"),
+    [dash.dependencies.Input("staff_stream", "data")],
+)
+
+app.clientside_callback(
+    dash.dependencies.ClientsideFunction(namespace="saxion", function_name="show_staff_data"),
+    [dash.dependencies.Output("staff_studies", "children"),
+     dash.dependencies.Output("staff_pages", "children"),
+     dash.dependencies.Output("staff_projects", "children")],
+    [dash.dependencies.Input("staff_data", "data")],
+)
+
+
+# Feedback without a sandbox (no compiler, or the kernel doesn't allow the isolation): [text within the program, feedback].
+# The most specific rule comes first, the first rule that matches gives the feedback.
+cpp_rules = [
+    ("std::cout << \"Hello, Saxion!\" << std::endl;", "Good job 🥳! Output of your program: \"Hello, Saxion!\""),
+    ("std::cout << \"\" << std::endl;", "Almost there! Compilation error: std::cout << \"\" << std::endl; <-- missing message within 'std::cout'"),
+    ("std::cout << \"\"", "Almost there! Compilation error: std::cout <-- missing ';' at the end of the line."),
+    ("std::cout", "Almost there! Compilation error: std::cout <-- missing argument."),
+]
+python_rules = [
+    ("print(\"Hello, Saxion!\")", "Good job 🥳! Output of your program: \"Hello, Saxion!\""),
+    ("print(\"\")", "Almost there! Compilation error: print <-- missing the message"),
+    ("print", "Almost there! Compilation error: print <-- missing argument."),
+]
+
+
+def rule_feedback(rules, source):
+    for text, feedback in rules:
+        if text in source:
+            return feedback
+    return "There are some compilation errors 😕! Try again!"
+
+
+def cpp_feedback(source, result):
+    # Feedback for a compiled and executed C++ program (see 'sandbox.py').
+    match result["status"]:
+        case "ok" if result["output"].strip() == "Hello, Saxion!":
             return "Good job 🥳! Output of your program: \"Hello, Saxion!\""
-        elif "std::cout" in value:
-            return "Almost there! Compilation error: std::cout <-- missing argument."
-        elif "std::cout << \"\"" in value:
-            return "Almost there! Compilation error: std::cout <-- missing ';' at the end of the line."
-        elif "std::cout << \"\" << std::endl;" in value:
-            return "Almost there! Compilation error: std::cout << \"\" << std::endl; <-- missing message within 'std::cout'"
-        else:
-            return "There are some compilation errors 😕! Try again!"
+        case "ok":
+            return "Almost there! Your program runs, but the output is \"{}\" instead of \"Hello, Saxion!\".".format(result["output"].strip())
+        case "compile_error":
+            errors = [line for line in result["output"].splitlines() if "error:" in line]
+            return "There are some compilation errors 😕! {}".format(errors[0].replace("main.cpp:", "Line ", 1) if errors else "Try again!")
+        case "timeout":
+            return "Your program takes too long to run ⏱️! Try again!"
+        case "runtime_error":
+            return "Your program crashed 💥! Try again!"
+        case "too_much_output":
+            return "Your program prints way too much text 📜! Try again!"
+        case "too_large":
+            return "Your program is too long! Try again with a smaller program."
+        case _:
+            return rule_feedback(cpp_rules, source)  # No sandbox available.
+
+
+@app.callback([dash.dependencies.Output("input_coding_text_area", "children", allow_duplicate=True),
+               dash.dependencies.Output("code_poll", "disabled")],
+              [dash.dependencies.Input("code_submission", "data"),
+               dash.dependencies.Input("code_poll", "n_intervals")],
+              prevent_initial_call=True)
+def validate_cpp_code(submission, n_intervals):
+    # Compiles and runs the program within the sandbox pool, without waiting for it. The interval polls until it's done.
+    if submission is None:
+        return dash.no_update, True
+
+    key = cpp_pool.submit(submission["source"])  # Submitting again is free, identical programs share one job.
+    result = cpp_pool.result(key)
+    if key is None:
+        return "Many students are running their program right now, yours is waiting for a free spot... ⏳", False
+    elif result is None:
+        return "Compiling your program... ⏳", False
     else:
-        return "Let's go coding! Enter your code within this little IDE (Integrated Developers Environment, a tool that programmers always use)."
+        feedback = cpp_feedback(submission["source"], result)
+        event_recorder.record("code_result", {"project": "cpp", "status": result["status"], "passed": feedback.startswith("Good job")})
+        return feedback, True
 
 
-@app.callback(dash.dependencies.Output("input_coding_text_area_software_engineering", "children"),
-              [dash.dependencies.Input("input_box_coding_software_engineering", "value"),
-               dash.dependencies.Input("run_program_button_software_engineering", "n_clicks")])
-def validate_code(value, n_clicks):
-    # Check for button presses, will be greater than one after a click. Could be improved, but just as a prototype (compare strings).
-    if n_clicks >= 1:
-        if "print(\"Hello, Saxion!\")" in value:
+def python_feedback(source, result):
+    # Feedback for an executed Python program (see 'sandbox.py').
+    match result["status"]:
+        case "ok" if result["output"].strip() == "Hello, Saxion!":
             return "Good job 🥳! Output of your program: \"Hello, Saxion!\""
-        elif "print" in value:
-            return "Almost there! Compilation error: print <-- missing argument."
-        elif "print(\"\")" in value:
-            return "Almost there! Compilation error: print <-- missing the message"
-        else:
-            return "There are some compilation errors 😕! Try again!"
+        case "ok":
+            return "Almost there! Your program runs, but the output is \"{}\" instead of \"Hello, Saxion!\".".format(result["output"].strip())
+        case "compile_error" | "runtime_error":
+            errors = result["output"].strip().splitlines()
+            return "There are some errors 😕! {}".format(errors[-1] if errors else "Try again!")
+        case "timeout":
+            return "Your program takes too long to run ⏱️! Try again!"
+        case "too_much_output":
+            return "Your program prints way too much text 📜! Try again!"
+        case "too_large":
+            return "Your program is too long! Try again with a smaller program."
+        case _:
+            return rule_feedback(python_rules, source)  # No sandbox available.
+
+
+@app.callback([dash.dependencies.Output("input_coding_text_area_software_engineering", "children", allow_duplicate=True),
+               dash.dependencies.Output("code_poll_software_engineering", "disabled")],
+              [dash.dependencies.Input("code_submission_software_engineering", "data"),
+               dash.dependencies.Input("code_poll_software_engineering", "n_intervals")],
+              prevent_initial_call=True)
+def validate_python_code(submission, n_intervals):
+    # Runs the program within the sandbox pool, without waiting for it. The interval polls until it's done.
+    if submission is None:
+        return dash.no_update, True
+
+    key = python_pool.submit(submission["source"])  # Submitting again is free, identical programs share one job.
+    result = python_pool.result(key)
+    if key is None:
+        return "Many students are running their program right now, yours is waiting for a free spot... ⏳", False
+    elif result is None:
+        return "Running your program... ⏳", False
     else:
-        return "Let's go coding! Enter your code within this little IDE (Integrated Developers Environment, a tool that programmers always use)."
+        feedback = python_feedback(submission["source"], result)
+        event_recorder.record("code_result", {"project": "python", "status": result["status"], "passed": feedback.startswith("Good job")})
+        return feedback, True
 
 
-@app.callback(dash.dependencies.Output("graph_container", "children"),
-              [dash.dependencies.Input("url", "pathname")])
-def show_chart(pathname):
+@app.callback([dash.dependencies.Output("graph_container", "children"),
+               dash.dependencies.Output("result_text", "children")],
+              [dash.dependencies.Input("url", "pathname")],
+              [dash.dependencies.State("adaptive_answers", "data")] if QUESTION_ORDER == "adaptive" else [])
+def show_chart(pathname, adaptive_answers=None):
     if pathname == "/page-9":
-        education_list = [0, 0, 0, 0, 0]
-
-        # This part is still hardcoded, but the response indicates the kind of education chosen. Due to time issues, and it is a prototype, we added some basic functionality
-
-        match initial_study_choice:
-            case "EEE_SAX":
-                education_list[0] = 95
-                education_list[1] = 30
-                education_list[2] = 56
-                education_list[3] = 67
-                education_list[4] = 23
-            case "ACS_SAX":
-                education_list[0] = 66
-                education_list[1] = 99
-                education_list[2] = 45
-                education_list[3] = 23
-                education_list[4] = 12
-            case "MT_SAX":
-                education_list[0] = 86
-                education_list[1] = 55
-                education_list[2] = 97
-                education_list[3] = 67
-                education_list[4] = 34
-            case "ICT_SAX":
-                education_list[0] = 23
-                education_list[1] = 44
-                education_list[2] = 55
-                education_list[3] = 90
-                education_list[4] = 23
-            case "IPO_SAX":
-                education_list[0] = 23
-                education_list[1] = 12
-                education_list[2] = 67
-                education_list[3] = 80
-                education_list[4] = 99
-
-        dataframe = pd.DataFrame({
-            "Education": ["Electrical Engineering", "Applied Computer Science", "Mechatronics", "Software Engineering",
-                          "Industrial Product Design"],
-            "Score (in %)": education_list
-        })
-
-        fig_of_data = px.bar(dataframe, x="Education", y="Score (in %)", barmode="group", color="Education", title="Best fit for education")
+        scores = tuple(int(round(score)) for score in scoring_engine.score(walk_answers(adaptive_answers)))
+        best_education = education_names[max(range(len(scores)), key=scores.__getitem__)]
 
         return html.Div(
             dcc.Graph(
-                id="Graph_{}".format(dataframe),
-                figure=fig_of_data.update_layout(title_text="Best fit for your education", title_x=0.5),
+                id="Graph_{}".format("_".join(str(score) for score in scores)),
+                figure=figure_cache.get(scores),  # Built once for every score vector, see 'charts.py'.
                 config={"displayModeBar": False, "responsive": False},
                 # Use this to configurate the top-bar from 'Dash' for each graph.
             ),
-        )
+        ), "You now have a general impression of which training suits you best. In this case it is {}, to which by pressing the next button you start a small simple project that introduces you further to this training.".format(best_education)
     else:
-        return None
+        return None, None
+
+
+# -------- KIOSK -------- #
+
+if KIOSK_MODE:
+    # A service worker answers the answers and the page changes without the network (see 'kiosk.py').
+    kiosk = Kiosk(app, event_recorder, reachable_layouts)
+    options = dict(questions)
+    for output, input_name, key in [
+        ("dropdown_high_school_notification.disabled", "initial_high_school_filter.value", "initial_high_school_choice"),
+        ("dropdown_high_school_text_notification.children", "initial_high_school_filter.value", "initial_high_school_choice"),
+        ("dropdown_notification.disabled", "initial_study_filter.value", "initial_study_choice"),
+        ("dropdown_text_notification.children", "initial_study_filter.value", "initial_study_choice"),
+        ("interest_notification.disabled", "initial_interest_filter.value", "initial_interest_choice"),
+    ]:
+        kiosk.add_offline_callback(output, input_name, options[key] + [None])
+    kiosk.install(server_run)
+    page_registry.on_reload.append(kiosk.clear)
+
+    app.layout.children += [
+        dcc.Store(id="kiosk_config", data={
+            "service_worker": app.config.routes_pathname_prefix + "service-worker.js",
+            "sync_interval": KIOSK_SYNC_INTERVAL,
+        }),
+        html.Div(id="kiosk_status", className="user_text_notify"),
+    ]
+
+    # Registers the service worker, and shows the student when the answers are waiting for the network.
+    app.clientside_callback(
+        dash.dependencies.ClientsideFunction(namespace="saxion", function_name="start_kiosk"),
+        dash.dependencies.Output("kiosk_status", "children"),
+        [dash.dependencies.Input("kiosk_config", "data")],
+    )
+
+if os.environ.get("PRUNE_CALLBACKS", "0") == "1":
+    # Callbacks that can never be called are not sent to the browser (see 'callback_analyzer.py').
+    prune_dead_callbacks(app, analyze(app, reachable_layouts()))
+
+if STARTUP_MODE == "eager":
+    http_cache.build()  # After all the callbacks are registered.
+
+# -------- START-UP -------- #
+
+startup_metrics = {
+    "mode": STARTUP_MODE,
+    "import_seconds": None,  # Importing this script, measured from its first line.
+    "warmup_seconds": None,
+    "first_requests": {},  # Latency (seconds) of the first request to every endpoint (or callback), after the warm-up.
+}
+warming_up = False
+
+
+def warm_up_request(client, output, pathname, state=()):
+    # One callback request with 'url.pathname' as its only input, like the browser sends it of a new student.
+    outputs = [dict(zip(("id", "property"), item.rsplit(".", 1))) for item in output.strip(".").split("...")]
+    client.post(app.config.routes_pathname_prefix + "_dash-update-component", json={
+        "output": output,
+        "outputs": outputs if len(outputs) > 1 else outputs[0],
+        "inputs": [{"id": "url", "property": "pathname", "value": pathname}],
+        "changedPropIds": ["url.pathname"],
+        "state": list(state),
+    })
+
+
+def warm_up(sandbox=True):
+    # Primes everything the first student would otherwise wait for: the heavy imports, the figures, the serialized layouts,
+    # the sandbox workers and the request path of 'Dash' itself ('/page-9' with its chart).
+    global warming_up
+    warming_up = True
+    started = time.perf_counter()
+
+    if FIGURE_MODE == "plotly":
+        load_plotting()  # A compact figure doesn't need 'pandas' or 'plotly.express' (see 'charts.py').
+    figure_cache.warm(known_score_vectors())
+    layout_cache.build()
+    http_cache.build()
+    if KIOSK_MODE:
+        kiosk.manifest()  # Sends requests of its own, so only after the set-up of the server.
+    if sandbox:
+        cpp_pool.warm()
+        python_pool.warm()
+
+    client = internal_client(server_run)  # The requests below are no students.
+    for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+        client.get(path)
+    if ROUTING_MODE == "server":
+        warm_up_request(client, "container.children", "/page-9")
+    warm_up_request(client, "..graph_container.children...result_text.children..", "/page-9",
+                    [{"id": "adaptive_answers", "property": "data", "value": {}}] if QUESTION_ORDER == "adaptive" else [])
+
+    startup_metrics["warmup_seconds"] = time.perf_counter() - started
+    warming_up = False
+
+
+def request_key():
+    # The endpoint, and for a callback also its output (so '/page-9' with 'show_chart' has its own entry).
+    request = flask.request
+    if request.path.endswith("_dash-update-component"):
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            return "{} {}".format(request.path, body.get("output"))
+    return request.path
+
+
+def start_first_request_timer():
+    if not warming_up and len(startup_metrics["first_requests"]) < 256:
+        flask.g.request_started = time.perf_counter()
+
+
+# First in line: the layout cache, the HTTP cache and the other hooks that answer before 'Dash' skip the hooks after them.
+server_run.before_request_funcs.setdefault(None, []).insert(0, start_first_request_timer)
+
+
+@server_run.after_request
+def measure_first_request(response):
+    started = getattr(flask.g, "request_started", None)
+    if started is not None:
+        startup_metrics["first_requests"].setdefault(request_key(), time.perf_counter() - started)
+    return response
+
+
+@server_run.route("/_startup")
+def show_startup_metrics():
+    return flask.jsonify(startup_metrics)
+
 
+startup_metrics["import_seconds"] = time.perf_counter() - startup_started
+
+if WARMUP:
+    warm_up()
 
 # -------- APPLICATION BOILERPLATE -------- #
 
 
 if __name__ == '__main__':
-    app.run_server(debug=False)  # Start our server, it is from now on possible to show our website.
+    # Development server, for the event itself use 'serve.py' (several worker processes with threads).
+    app.run(debug=False)  # Start our server, it is from now on possible to show our website.
@@ -0,0 +1,222 @@
+# Information:
+# Latency metrics for every 'Dash' callback, shown at '/metrics' in the Prometheus text format.
+# Every request to '_dash-update-component' is counted per callback (the name of the function and its output): the number
+# of calls, the errors, a latency histogram and a histogram of the response size. Outputs that aren't a callback of the
+# application are counted together as "unknown". Recording a request is one dict lookup
+# and a few additions under a lock, cheap enough to leave on.
+#
+# With several worker processes (see 'serve.py') every worker only knows its own requests. Set 'METRICS_DIR' to a folder
+# shared by the workers: every worker then writes its numbers to this folder, and '/metrics' adds up all the workers.
+
+import bisect
+import json
+import os
+import re
+import threading
+import time
+
+import flask
+
+METRICS_DIR = os.environ.get("METRICS_DIR")  # Shared folder for several worker processes, not needed for one process.
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))  # Seconds between two writes to 'METRICS_DIR'.
+
+# Upper bounds of the histogram buckets, '+Inf' is added when the metrics are shown.
+latency_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Seconds.
+size_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # Bytes.
+
+# Labels of a request for an output that isn't a callback: the output comes from the client, so only the known outputs get
+# their own series (else every made-up output would add one).
+unknown_labels = ("unknown", "unknown")
+
+
+def new_series():
+    return {
+        "requests": 0,
+        "errors": 0,
+        "latency_buckets": [0] * (len(latency_buckets) + 1),
+        "latency_sum": 0.0,
+        "size_buckets": [0] * (len(size_buckets) + 1),
+        "size_sum": 0,
+    }
+
+
+def merge_series(total, series):
+    total["requests"] += series["requests"]
+    total["errors"] += series["errors"]
+    total["latency_sum"] += series["latency_sum"]
+    total["size_sum"] += series["size_sum"]
+    for index, count in enumerate(series["latency_buckets"]):
+        total["latency_buckets"][index] += count
+    for index, count in enumerate(series["size_buckets"]):
+        total["size_buckets"][index] += count
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_histogram(lines, name, labels, bounds, counts, total):
+    # Prometheus histograms are cumulative, every bucket also counts the observations of the smaller buckets.
+    cumulative = 0
+    for bound, count in zip(list(bounds) + ["+Inf"], counts):
+        cumulative += count
+        lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, cumulative))
+    lines.append("{}_sum{{{}}} {}".format(name, labels, total))
+    lines.append("{}_count{{{}}} {}".format(name, labels, cumulative))
+
+
+class CallbackMetrics:
+    def __init__(self, metrics_dir=METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.series = {}  # (callback, output) -> series, see 'new_series'.
+        self.names = {}  # Output of a callback -> labels, see 'callback_labels'.
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def callback_labels(self, app, output):
+        # Name of the function, and the output without the hash 'Dash' adds for 'allow_duplicate' (for instance '@9f2c...').
+        labels = self.names.get(output)
+        if labels is None:
+            if not isinstance(output, str) or output not in app.callback_map:
+                return unknown_labels
+            callback = app.callback_map[output].get("callback")
+            labels = (getattr(callback, "__name__", "unknown"), re.sub(r"@[0-9a-f]+", "", output))
+            self.names[output] = labels
+        return labels
+
+    def observe(self, callback, output, seconds, size, error):
+        key = (callback, output)
+        latency_index = bisect.bisect_left(latency_buckets, seconds)
+        size_index = bisect.bisect_left(size_buckets, size)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = new_series()
+            series["requests"] += 1
+            series["errors"] += error
+            series["latency_buckets"][latency_index] += 1
+            series["latency_sum"] += seconds
+            series["size_buckets"][size_index] += 1
+            series["size_sum"] += size
+
+    def snapshot(self):
+        with self._lock:
+            return {key: json.loads(json.dumps(series)) for key, series in self.series.items()}
+
+    # -------- SEVERAL PROCESSES -------- #
+
+    def worker_file(self, pid=None):
+        return os.path.join(self.metrics_dir, "metrics-{}.json".format(pid or os.getpid()))
+
+    def flush(self):
+        # Write atomically, '/metrics' of another worker may read this file at the same moment.
+        rows = [[callback, output, series] for (callback, output), series in self.snapshot().items()]
+        path = self.worker_file()
+        with open(path + ".tmp", "w", encoding="utf-8") as metrics_file:
+            json.dump(rows, metrics_file)
+        os.replace(path + ".tmp", path)
+
+    def start_flusher(self):
+        # One thread per process, a forked worker starts its own one on its first request.
+        if self.metrics_dir is None or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        os.makedirs(self.metrics_dir, exist_ok=True)
+
+        def flush_forever():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+
+        threading.Thread(target=flush_forever, name="metrics-flusher", daemon=True).start()
+
+    def collect(self):
+        # Own numbers are always up-to-date, the other workers are read from their last flush.
+        totals = self.snapshot()
+        if self.metrics_dir is None or not os.path.isdir(self.metrics_dir):
+            return totals
+
+        own_file = os.path.basename(self.worker_file())
+        for filename in os.listdir(self.metrics_dir):
+            if not filename.endswith(".json") or filename == own_file:
+                continue
+            try:
+                with open(os.path.join(self.metrics_dir, filename), encoding="utf-8") as metrics_file:
+                    rows = json.load(metrics_file)
+            except (OSError, ValueError):
+                continue
+            for callback, output, series in rows:
+                total = totals.setdefault((callback, output), new_series())
+                merge_series(total, series)
+        return totals
+
+    # -------- EXPOSITION -------- #
+
+    def render(self):
+        totals = self.collect()
+        lines = [
+            "# HELP saxion_callback_requests_total Requests to a Dash callback.",
+            "# TYPE saxion_callback_requests_total counter",
+        ]
+        for (callback, output), series in sorted(totals.items()):
+            labels = 'callback="{}",output="{}"'.format(escape_label(callback), escape_label(output))
+            lines.append("saxion_callback_requests_total{{{}}} {}".format(labels, series["requests"]))
+
+        lines += [
+            "# HELP saxion_callback_errors_total Requests to a Dash callback that failed (status 500 or higher).",
+            "# TYPE saxion_callback_errors_total counter",
+        ]
+        for (callback, output), series in sorted(totals.items()):
+            labels = 'callback="{}",output="{}"'.format(escape_label(callback), escape_label(output))
+            lines.append("saxion_callback_errors_total{{{}}} {}".format(labels, series["errors"]))
+
+        lines += [
+            "# HELP saxion_callback_latency_seconds Time to answer a request to a Dash callback.",
+            "# TYPE saxion_callback_latency_seconds histogram",
+        ]
+        for (callback, output), series in sorted(totals.items()):
+            labels = 'callback="{}",output="{}"'.format(escape_label(callback), escape_label(output))
+            format_histogram(lines, "saxion_callback_latency_seconds", labels, latency_buckets,
+                             series["latency_buckets"], series["latency_sum"])
+
+        lines += [
+            "# HELP saxion_callback_response_bytes Size of the response body of a Dash callback (after compression).",
+            "# TYPE saxion_callback_response_bytes histogram",
+        ]
+        for (callback, output), series in sorted(totals.items()):
+            labels = 'callback="{}",output="{}"'.format(escape_label(callback), escape_label(output))
+            format_histogram(lines, "saxion_callback_response_bytes", labels, size_buckets,
+                             series["size_buckets"], series["size_sum"])
+
+        return "\n".join(lines) + "\n"
+
+    def install(self, app):
+        server = app.server
+        callback_path = app.config.routes_pathname_prefix + "_dash-update-component"
+
+        def start_callback_timer():
+            request = flask.request
+            if request.method == "POST" and request.path == callback_path:
+                self.start_flusher()
+                flask.g.callback_started = time.perf_counter()
+
+        # First in line, so the time of the other hooks (like the layout cache, which answers before 'Dash') is included.
+        server.before_request_funcs.setdefault(None, []).insert(0, start_callback_timer)
+
+        @server.after_request
+        def measure_callback(response):
+            started = flask.g.pop("callback_started", None)
+            if started is None:
+                return response
+
+            body = flask.request.get_json(silent=True)
+            output = body.get("output", "unknown") if isinstance(body, dict) else "unknown"
+            size = 0 if response.is_streamed else response.content_length or 0
+            callback, output_label = self.callback_labels(app, output)
+            self.observe(callback, output_label, time.perf_counter() - started, size, response.status_code >= 500)
+            return response
+
+        @server.route("/metrics")
+        def show_metrics():
+            return flask.Response(self.render(), mimetype="text/plain; version=0.0.4")
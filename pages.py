@@ -0,0 +1,173 @@
+# Information:
+# Registry of the pages of the StudyCheckinator 900. The content of every page (title, text, image, links) is data within
+# 'pages.json', so the event coordinators can change the text without touching the code. The interactive parts of a page
+# (dropdowns, the code editors, the chart) are "widgets": components with the ids the callbacks listen to, defined within
+# 'main.py' and referred to by name from 'pages.json'.
+#
+# A page is compiled to a 'Dash' layout on its first use, and kept until the content file changes. Every worker checks the
+# modification time of the file (at most once per 'PAGES_RELOAD_INTERVAL' seconds) and reloads it when it changed, so new
+# text is shown without restarting the server. An invalid file is ignored, the previous pages stay in use.
+#
+# A page within 'pages.json':
+#   {"path": "/page-5", "title": "...", "text": ["paragraph", ...], "image": {"src": "NAME.png", "width": 700, "height": 600},
+#    "widget": "name of a widget", "footer": ["paragraph", ...], "links": [{"label": "Continue", "href": "/page-6"}]}
+# Only 'path' and 'title' are required. A link may have an "id", for a button that's enabled by a callback, and a "link_id",
+# for a link whose target is chosen by a callback (the "href" is then the target until the callback has run).
+#
+# A page without a widget and without buttons that a callback enables is static: it can be exported to a plain HTML file
+# (see 'static_export.py'). With 'STATIC_SITE=1' these files are served by a file server, and a link to a static page leaves
+# the application (a full page load) so the file server answers it instead of 'Dash'.
+
+import json
+import os
+import sys
+import threading
+import time
+
+from dash import dcc
+from dash import html
+
+PAGES_FILE = os.environ.get("PAGES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages.json"))
+PAGES_RELOAD_INTERVAL = float(os.environ.get("PAGES_RELOAD_INTERVAL", 1))  # 0 disables the reloading.
+STATIC_SITE = os.environ.get("STATIC_SITE", "0") == "1"
+STATIC_SITE_URL = os.environ.get("STATIC_SITE_URL", "")  # Host of the static pages, empty when it's the same host.
+
+
+def is_static(page):
+    return "widget" not in page and not any("id" in link for link in page.get("links", []))
+
+
+def compile_page(page, widgets, asset_url, static_paths=(), static_url=""):
+    children = [html.H1(page["title"])]
+    children += [html.P(text) for text in page.get("text", [])]
+
+    if "image" in page:
+        image = page["image"]
+        children.append(html.Img(src=asset_url(image["src"]), width=str(image["width"]), height=str(image["height"]),
+                                 alt=image.get("alt", "")))
+    if "widget" in page:
+        children.append(widgets[page["widget"]])
+
+    children += [html.P(text) for text in page.get("footer", [])]
+
+    links = []
+    for link in page.get("links", []):
+        button = html.Button(link["label"], id=link["id"], className="button") if "id" in link else \
+            html.Button(link["label"], className="button")
+        if link["href"] in static_paths:
+            # Handed off to the file server of the static pages.
+            options = {"href": static_url + link["href"], "refresh": True}
+        else:
+            options = {"href": link["href"]}
+        links.append(dcc.Link(button, id=link["link_id"], **options) if "link_id" in link else dcc.Link(button, **options))
+    if links:
+        children.append(html.Div(children=links))
+
+    return html.Div(children=children, className="menu")
+
+
+def validate(content, widgets):
+    # Raises a 'ValueError' for a mistake within the content file, before the pages are replaced.
+    paths = set()
+    for page in content["pages"]:
+        if "path" not in page or "title" not in page:
+            raise ValueError("Every page needs a 'path' and a 'title': {}".format(page))
+        if page["path"] in paths:
+            raise ValueError("The page {} is defined twice.".format(page["path"]))
+        if "widget" in page and page["widget"] not in widgets:
+            raise ValueError("Unknown widget '{}' on page {}.".format(page["widget"], page["path"]))
+        paths.add(page["path"])
+    if content.get("fallback", "/") not in paths:
+        raise ValueError("The fallback page {} doesn't exist.".format(content.get("fallback", "/")))
+
+
+class PageRegistry:
+    def __init__(self, widgets, asset_url, path=PAGES_FILE, reload_interval=PAGES_RELOAD_INTERVAL, static_site=STATIC_SITE,
+                 static_url=STATIC_SITE_URL):
+        self.widgets = widgets
+        self.asset_url = asset_url
+        self.path = path
+        self.reload_interval = reload_interval
+        self.static_site = static_site
+        self.static_url = static_url
+        self.on_reload = []  # Functions called after the content changed, for instance to clear a cache.
+        self.version = 0
+        self.fallback = "/"
+        self._pages = {}  # Path -> content of the page.
+        self._layouts = {}  # Path -> compiled layout, filled in on first use.
+        self._modified = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as pages_file:
+            modified = os.fstat(pages_file.fileno()).st_mtime_ns
+            content = json.load(pages_file)
+        validate(content, self.widgets)
+
+        with self._lock:
+            self._pages = {page["path"]: page for page in content["pages"]}
+            self._layouts = {}
+            self.fallback = content.get("fallback", "/")
+            self._modified = modified
+            self.version += 1
+
+    def refresh(self):
+        # Cheap enough for every request: a clock read, and at most once per interval a 'stat' of the content file.
+        now = time.monotonic()
+        if self.reload_interval <= 0 or now - self._checked < self.reload_interval:
+            return False
+        self._checked = now
+
+        try:
+            modified = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if modified == self._modified:
+            return False
+
+        try:
+            self.load()
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            print("Pages not reloaded, {} is invalid: {}".format(self.path, error), file=sys.stderr)
+            self._modified = modified  # Try again after the next change, instead of every interval.
+            return False
+
+        for function in self.on_reload:
+            function()
+        return True
+
+    def layout(self, path):
+        layout = self._layouts.get(path)
+        if layout is None:
+            page = self._pages.get(path)
+            if page is None:
+                return None
+            static_paths = self.static_paths() if self.static_site else ()
+            layout = self._layouts[path] = compile_page(page, self.widgets, self.asset_url, static_paths, self.static_url)
+        return layout
+
+    def get(self, path, default=None):
+        layout = self.layout(path)
+        return default if layout is None else layout
+
+    def paths(self):
+        return list(self._pages)
+
+    def static_paths(self):
+        return [path for path, page in self._pages.items() if is_static(page)]
+
+    def content(self, path):
+        # The page as written within 'pages.json'.
+        return self._pages.get(path)
+
+    def items(self):
+        return [(path, self.layout(path)) for path in self.paths()]
+
+    def install(self, server):
+        # Check for new content before every request, so all the requests of one page change see the same version.
+        def refresh_pages():
+            self.refresh()
+
+        server.before_request_funcs.setdefault(None, []).insert(0, refresh_pages)
@@ -0,0 +1,171 @@
+# Information:
+# Sampling profiler for the callbacks, to see where the time of a slow request goes (for instance 'show_chart': 'pandas',
+# 'plotly' or the JSON encoding) on a live server, without a debugger.
+# * Slow requests: while a request to '_dash-update-component' runs, a background thread records the stack of its thread
+#   every few milliseconds. When the request took longer than 'SLOW_REQUEST_SECONDS', its profile is kept (the last
+#   'SLOW_PROFILES_KEPT' ones), otherwise it's thrown away. Nothing is sampled while no callback runs.
+# * On demand: '/_profile?seconds=N' samples every thread for N seconds.
+# Both return "folded" stacks (one line per stack: 'frame;frame;frame count'), which can be opened directly with
+# https://www.speedscope.app or turned into an SVG with 'flamegraph.pl'.
+#
+# The profiler is opt-in: without 'PROFILER_TOKEN' nothing is sampled and the endpoints are disabled. With a token, it must be
+# sent as 'X-Profiler-Token' header:
+#   curl -H "X-Profiler-Token: $PROFILER_TOKEN" "http://127.0.0.1:8050/_profile?seconds=10" > profile.folded
+#   curl -H "X-Profiler-Token: $PROFILER_TOKEN" "http://127.0.0.1:8050/_profile/slow"
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import flask
+
+PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN")  # Without a token the profiler is off.
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", 1))  # 0 disables the capture of slow requests.
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.005))  # Seconds between two samples.
+SLOW_PROFILES_KEPT = int(os.environ.get("SLOW_PROFILES_KEPT", 20))
+MAX_PROFILE_SECONDS = 60  # Longest on-demand profile.
+
+
+def frame_name(frame):
+    # 'module:function', for instance 'plotly.io._json:to_json_plotly'.
+    return "{}:{}".format(frame.f_globals.get("__name__", "?"), frame.f_code.co_name)
+
+
+def folded_stack(frame):
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))  # The root of the stack comes first.
+
+
+def format_folded(samples):
+    return "".join("{} {}\n".format(stack, count) for stack, count in samples.most_common())
+
+
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_INTERVAL, slow_threshold=SLOW_REQUEST_SECONDS, kept=SLOW_PROFILES_KEPT):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.slow_profiles = deque(maxlen=kept)
+        self._requests = {}  # Thread id -> running request, see 'start_request'.
+        self._sessions = []  # Counters of the running on-demand profiles, these sample every thread.
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._sampler_pid = None
+
+    def start_sampler(self):
+        # One thread per process, a forked worker (see 'serve.py') starts its own one.
+        if self._sampler_pid == os.getpid():
+            return
+        self._sampler_pid = os.getpid()
+        threading.Thread(target=self.sample_forever, name="profiler", daemon=True).start()
+
+    def sample_forever(self):
+        own_thread = threading.get_ident()
+        while True:
+            with self._lock:
+                busy = bool(self._requests or self._sessions)
+            if not busy:
+                self._wake_up.wait()
+                self._wake_up.clear()
+                continue
+
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, request in self._requests.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        request["samples"][folded_stack(frame)] += 1
+                if self._sessions:
+                    stacks = [folded_stack(frame) for thread_id, frame in frames.items() if thread_id != own_thread]
+                    for samples in self._sessions:
+                        samples.update(stacks)
+            del frames
+            time.sleep(self.interval)
+
+    # -------- SLOW REQUESTS -------- #
+
+    def start_request(self, description):
+        self.start_sampler()
+        with self._lock:
+            self._requests[threading.get_ident()] = {
+                "request": description,
+                "started": time.perf_counter(),
+                "samples": Counter(),
+            }
+        self._wake_up.set()
+
+    def finish_request(self):
+        with self._lock:
+            request = self._requests.pop(threading.get_ident(), None)
+        if request is None:
+            return
+
+        seconds = time.perf_counter() - request["started"]
+        if seconds >= self.slow_threshold:
+            self.slow_profiles.append({
+                "request": request["request"],
+                "seconds": round(seconds, 4),
+                "finished": time.time(),
+                "samples": sum(request["samples"].values()),
+                "folded": format_folded(request["samples"]),
+            })
+
+    # -------- ON DEMAND -------- #
+
+    def profile(self, seconds):
+        self.start_sampler()
+        samples = Counter()
+        with self._lock:
+            self._sessions.append(samples)
+        self._wake_up.set()
+        try:
+            time.sleep(seconds)
+        finally:
+            with self._lock:
+                self._sessions.remove(samples)
+        return samples
+
+    def install(self, app, token=PROFILER_TOKEN):
+        server = app.server
+        callback_path = app.config.routes_pathname_prefix + "_dash-update-component"
+
+        if self.slow_threshold > 0 and token:
+            # Only with a token: the sampler takes the GIL every few milliseconds while a callback runs.
+            def start_profiling_callback():
+                request = flask.request
+                if request.method == "POST" and request.path == callback_path:
+                    body = request.get_json(silent=True)
+                    self.start_request(body.get("output") if isinstance(body, dict) else None)
+                    flask.g.profiling_callback = True
+
+            server.before_request_funcs.setdefault(None, []).insert(0, start_profiling_callback)
+
+            # A teardown hook also runs when the callback raised an exception.
+            @server.teardown_request
+            def finish_profiling_callback(exception):
+                if flask.g.pop("profiling_callback", False):
+                    self.finish_request()
+
+        if not token:
+            return
+
+        def authorized():
+            return hmac.compare_digest(flask.request.headers.get("X-Profiler-Token", ""), token)
+
+        @server.route("/_profile")
+        def profile_on_demand():
+            if not authorized():
+                flask.abort(403)
+            seconds = min(max(flask.request.args.get("seconds", 10, type=float), 0.1), MAX_PROFILE_SECONDS)
+            return flask.Response(format_folded(self.profile(seconds)), mimetype="text/plain")
+
+        @server.route("/_profile/slow")
+        def show_slow_requests():
+            if not authorized():
+                flask.abort(403)
+            return flask.jsonify(list(reversed(self.slow_profiles)))  # Newest first.
@@ -0,0 +1,131 @@
+# Information:
+# Scoring engine for the answers of a student (pages 1 - 8).
+# Every answer is one-hot encoded into a feature vector, the scores are computed with one matrix product:
+#   scores = clip(bias + features @ weights, 0, 100)
+# where 'weights' has one row per answer option and one column per education. A whole batch of stored sessions is scored in
+# one call ('score_batch'), so re-tuned weights can re-rank all the historical students within seconds.
+
+import json
+import os
+
+import numpy as np
+
+SCORING_WEIGHTS = os.environ.get("SCORING_WEIGHTS")  # Optional JSON file with re-tuned weights (same layout as 'default_weights').
+
+# The educations, every score vector uses this order.
+education_codes = ["EEE_SAX", "ACS_SAX", "MT_SAX", "ICT_SAX", "IPO_SAX"]
+education_names = ["Electrical Engineering", "Applied Computer Science", "Mechatronics", "Software Engineering",
+                   "Industrial Product Design"]
+
+# All the questions (session key) with their possible answers, in the order of the feature vector.
+questions = [
+    ("initial_high_school_choice", ["HAVO_SAX", "VWO_SAX", "MBO_SAX"]),  # Page 1.
+    ("initial_study_choice", ["EEE_SAX", "ACS_SAX", "MT_SAX", "ICT_SAX", "IPO_SAX", "NONE_SAX"]),  # Page 2.
+    ("initial_interest_choice", ["MICRO_CONT_SAX", "ROBOT_SAX", "PCB_SAX", "PROD_DESIGN_SAX"]),  # Page 3.
+    ("marble_electronics", ["YES", "NO"]),  # Marble game: do you like electronics?
+    ("marble_mechanics", ["YES", "NO"]),  # Marble game: do you like mechanics?
+    ("marble_focus", ["GLOBAL", "SPECIFIC"]),  # Marble game: are you a more global person or do you focus on one thing?
+    ("marble_components", ["HOW", "APPLY"]),  # Marble game: how do components work, or how to apply them?
+]
+
+# Points added to the base score, per answer: [EEE, ACS, MT, SE, IPD].
+# A study preference alone gives the same scores as the first (hardcoded) version of the result page.
+default_bias = 50
+default_weights = {
+    "initial_high_school_choice": {
+        "HAVO_SAX": [0, 3, 0, 3, 2],
+        "VWO_SAX": [2, 5, 0, 4, 0],
+        "MBO_SAX": [4, 0, 5, 0, 2],
+    },
+    "initial_study_choice": {
+        "EEE_SAX": [45, -20, 6, 17, -27],
+        "ACS_SAX": [16, 49, -5, -27, -38],
+        "MT_SAX": [36, 5, 47, 17, -16],
+        "ICT_SAX": [-27, -6, 5, 40, -27],
+        "IPO_SAX": [-27, -38, 17, 30, 49],
+        "NONE_SAX": [0, 0, 0, 0, 0],
+    },
+    "initial_interest_choice": {
+        "MICRO_CONT_SAX": [8, 8, 4, 0, -4],
+        "ROBOT_SAX": [2, 2, 12, 0, 0],
+        "PCB_SAX": [12, 0, 4, -4, 0],
+        "PROD_DESIGN_SAX": [-4, -4, 2, 0, 12],
+    },
+    "marble_electronics": {
+        "YES": [10, 4, 5, 0, -3],
+        "NO": [-10, 0, -4, 3, 4],
+    },
+    "marble_mechanics": {
+        "YES": [0, -3, 10, -3, 6],
+        "NO": [0, 4, -8, 4, -4],
+    },
+    "marble_focus": {
+        "GLOBAL": [0, -2, 5, 2, 5],
+        "SPECIFIC": [3, 4, -2, 2, -3],
+    },
+    "marble_components": {
+        "HOW": [6, 5, 3, 2, -3],
+        "APPLY": [-3, 0, 4, 3, 6],
+    },
+}
+
+
+class ScoringEngine:
+    def __init__(self, weights=None, bias=default_bias):
+        weights = weights or default_weights
+
+        # Column offset of every question within the feature vector, and the index of every answer.
+        self.offsets = {}
+        self.answer_indices = {}
+        rows = []
+        for key, options in questions:
+            self.offsets[key] = len(rows)
+            self.answer_indices[key] = {option: index for index, option in enumerate(options)}
+            for option in options:
+                rows.append(weights.get(key, {}).get(option, [0] * len(education_codes)))
+
+        self.weights = np.asarray(rows, dtype=np.float64)  # Shape: (features, educations).
+        self.bias = np.full(len(education_codes), bias, dtype=np.float64) if np.isscalar(bias) else np.asarray(bias, dtype=np.float64)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as weights_file:
+            data = json.load(weights_file)
+        return cls(data["weights"], data.get("bias", default_bias))
+
+    @property
+    def feature_count(self):
+        return self.weights.shape[0]
+
+    def encode_batch(self, answers_list):
+        # One row per student, unknown or missing answers leave their part of the row at zero.
+        features = np.zeros((len(answers_list), self.feature_count), dtype=np.float64)
+        for key, indices in self.answer_indices.items():
+            answer_index = np.fromiter((indices.get(answers.get(key), -1) for answers in answers_list), dtype=np.int64, count=len(answers_list))
+            rows = np.flatnonzero(answer_index >= 0)
+            features[rows, self.offsets[key] + answer_index[rows]] = 1.0
+        return features
+
+    def encode(self, answers):
+        return self.encode_batch([answers])[0]
+
+    def score_features(self, features):
+        return np.clip(self.bias + features @ self.weights, 0, 100)
+
+    def score_batch(self, answers_list):
+        # Scores (in %) for a list of answer dicts, shape: (students, educations).
+        return self.score_features(self.encode_batch(answers_list))
+
+    def score(self, answers):
+        return self.score_batch([answers])[0]
+
+    def rank_batch(self, answers_list):
+        # Index of the best fitting education (see 'education_codes') for every student.
+        return np.argmax(self.score_batch(answers_list), axis=1)
+
+    def best_education(self, answers):
+        return int(np.argmax(self.score(answers)))
+
+
+def create_scoring_engine(path=SCORING_WEIGHTS):
+    return ScoringEngine.from_file(path) if path else ScoringEngine()
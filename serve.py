@@ -0,0 +1,211 @@
+# Information:
+# Production launcher for the StudyCheckinator 900, instead of the development server of 'main.py'.
+# Modes:
+# * prefork (default): the master process imports the application once (layouts, figures and caches included), then forks
+#   the workers. The workers share this memory copy-on-write, every worker serves requests with a pool of threads, so one
+#   slow request never blocks the other students.
+# * threaded: one process with a pool of threads (for instance on a small kiosk computer).
+#
+# Signals (prefork mode):
+# * SIGHUP: graceful reload. The master starts again with the new code, on the same listening socket. The old workers
+#   finish their requests while the new workers already accept new ones, so no request is dropped.
+# * SIGTERM / SIGINT: graceful shutdown, the workers finish their requests first.
+#
+# Run from the root of the repository:
+#   python3 serve.py --port 8050
+# 'gunicorn --preload --workers 4 --threads 8 main:server_run' works as well, when it's installed.
+
+import argparse
+import atexit
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+LISTEN_FD_VARIABLE = "SAXION_LISTEN_FD"  # Listening socket, handed over to the new master during a reload.
+OLD_WORKERS_VARIABLE = "SAXION_OLD_WORKERS"  # Workers of the previous master, stopped when the new workers run.
+
+GRACEFUL_TIMEOUT = 30  # Seconds a worker gets to finish its requests, before it's killed.
+
+
+def default_workers():
+    return max(2, os.cpu_count() or 1)
+
+
+# -------- WORKER -------- #
+
+
+def serve_forever(server):
+    # Stop accepting new connections on SIGTERM, requests that are running are finished first.
+    def stop(signal_number, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)  # Reloading is done by the master.
+
+    server.serve_forever()
+    server.server_close()  # Waits for the request threads (see 'make_worker_server').
+
+
+def make_worker_server(app, host, port, fd=None):
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    server.daemon_threads = False  # Let 'server_close' wait for running requests.
+    server.block_on_close = True
+    return server
+
+
+def run_worker(app, host, port, fd):
+    try:
+        serve_forever(make_worker_server(app, host, port, fd))
+        atexit._run_exitfuncs()  # For instance the queued events (see 'events.py'), 'os._exit' skips these.
+    finally:
+        os._exit(0)  # Never return into the loop of the master.
+
+
+# -------- MASTER -------- #
+
+
+class Master:
+    def __init__(self, app, host, port, workers, listen_fd):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.listen_fd = listen_fd
+        self.children = set()
+        self.stopping = False
+        self.reloading = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.app, self.host, self.port, self.listen_fd)
+        self.children.add(pid)
+
+    def stop_workers(self, pids, timeout=GRACEFUL_TIMEOUT):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    finished, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    finished = pid
+                if finished:
+                    remaining.discard(pid)
+            time.sleep(0.05)
+        for pid in remaining:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    def run(self, old_workers=()):
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        for _ in range(self.workers):
+            self.spawn()
+        if old_workers:
+            # The new workers accept connections, the workers of the old code can finish now.
+            threading.Thread(target=self.stop_workers, args=(old_workers,), daemon=True).start()
+
+        print("Master {} serves http://{}:{}/ with {} workers.".format(os.getpid(), self.host, self.port, self.workers), flush=True)
+
+        # Poll instead of a blocking 'waitpid', which is restarted after a signal and would never see the flags below.
+        while not self.stopping and not self.reloading:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid in self.children:
+                self.children.discard(pid)
+                self.spawn()  # A worker crashed, replace it.
+            elif pid == 0:
+                time.sleep(0.2)
+
+        if self.reloading:
+            self.reload()
+        else:
+            self.stop_workers(self.children)
+
+    def handle_stop(self, signal_number, frame):
+        self.stopping = True
+
+    def handle_reload(self, signal_number, frame):
+        self.reloading = True
+
+    def reload(self):
+        # Start this script again within the same process (so the workers stay our children), on the same socket.
+        os.set_inheritable(self.listen_fd, True)
+        os.environ[LISTEN_FD_VARIABLE] = str(self.listen_fd)
+        os.environ[OLD_WORKERS_VARIABLE] = ",".join(str(pid) for pid in self.children)
+        print("Master {} reloads.".format(os.getpid()), flush=True)
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+def open_listen_socket(host, port):
+    inherited = os.environ.pop(LISTEN_FD_VARIABLE, None)
+    if inherited is not None:
+        return int(inherited)
+
+    listen_socket = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_socket.bind((host, port))
+    listen_socket.listen(2048)
+    listen_socket.set_inheritable(True)
+    return listen_socket.detach()
+
+
+def load_application(warm_up):
+    import main  # Preload: everything this import builds is shared copy-on-write with the workers.
+
+    if warm_up:
+        main.warm_up(sandbox=False)  # The sandbox workers are started within every server worker.
+    return main.server_run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Production server for the StudyCheckinator 900.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8050)))
+    parser.add_argument("--mode", choices=("prefork", "threaded"), default="prefork" if hasattr(os, "fork") else "threaded")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Worker processes (prefork), default: the number of CPUs.")
+    parser.add_argument("--no-warm-up", action="store_true", help="Don't prime the charts and layouts before serving.")
+    arguments = parser.parse_args()
+
+    if arguments.mode == "prefork" and arguments.workers > 1:
+        # The answers of a student reach any of the workers, so they must share the session store (see 'session_store.py').
+        os.environ.setdefault("SESSION_BACKEND", "sqlite")
+        if os.environ["SESSION_BACKEND"] == "memory":
+            parser.error("SESSION_BACKEND=memory is only shared within one worker, use 'sqlite' or '--workers 1'.")
+
+    app = load_application(warm_up=not arguments.no_warm_up)
+
+    if arguments.mode == "threaded":
+        print("Serving http://{}:{}/ with threads.".format(arguments.host, arguments.port), flush=True)
+        serve_forever(make_worker_server(app, arguments.host, arguments.port))
+        return
+
+    listen_fd = open_listen_socket(arguments.host, arguments.port)
+    old_workers = [int(pid) for pid in os.environ.pop(OLD_WORKERS_VARIABLE, "").split(",") if pid]
+
+    gc.collect()
+    gc.freeze()  # Keep the preloaded objects out of the garbage collector, so the workers don't copy their memory pages.
+
+    Master(app, arguments.host, arguments.port, arguments.workers, listen_fd).run(old_workers)
+
+
+if __name__ == "__main__":
+    main()
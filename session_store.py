@@ -0,0 +1,178 @@
+# Information:
+# Session-scoped state for the StudyCheckinator 900.
+# Every browser gets its own session id (stored within a cookie), all the answers of a student are saved under this id.
+# This replaces the global variables that were used before, so multiple workers (and hosts) can serve the same students.
+# Backends:
+# * memory: in-process LRU with a TTL, fast but only shared between the threads of one worker.
+# * sqlite: shared file on disk, can be used by all the workers on one host (works as a small Redis stand-in).
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import flask
+
+# -------- CONFIGURATION -------- #
+
+SESSION_COOKIE_NAME = "saxion_session"
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")  # Name of the backend, see 'session_backends' below.
+SESSION_DB = os.environ.get("SESSION_DB", "sessions.sqlite3")  # Only used by the 'sqlite' backend.
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 2 * 60 * 60))  # Seconds, an open day visit takes less than two hours.
+SESSION_MAX_ENTRIES = int(os.environ.get("SESSION_MAX_ENTRIES", 10000))  # Only used by the 'memory' backend.
+
+# -------- BACKENDS -------- #
+
+
+class MemoryBackend:
+    # LRU + TTL store, the least recently used session is evicted when the store is full.
+
+    def __init__(self, max_entries=SESSION_MAX_ENTRIES, ttl=SESSION_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # Session id -> (expiry time, data).
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return {}
+            if entry[0] < time.monotonic():
+                del self._entries[session_id]
+                return {}
+            self._entries.move_to_end(session_id)
+            return dict(entry[1])
+
+    def update(self, session_id, values):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            data = dict(entry[1]) if entry is not None and entry[0] >= time.monotonic() else {}
+            data.update(values)
+            self._entries[session_id] = (time.monotonic() + self.ttl, data)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SQLiteBackend:
+    # Shared store, every worker process opens the same database file. WAL mode allows readers next to one writer.
+
+    purge_interval = 500  # Remove expired sessions after this many writes.
+
+    def __init__(self, path=SESSION_DB, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()  # SQLite connections can't be shared between threads.
+        self._writes = 0
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        # A connection can't be shared with a forked worker (see 'serve.py'), so every process opens its own.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND expires >= ?", (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else {}
+
+    def update(self, session_id, values):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")  # Take the write lock before reading, so two workers can't lose an update.
+        try:
+            row = connection.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expires >= ?", (session_id, time.time())
+            ).fetchone()
+            data = json.loads(row[0]) if row is not None else {}
+            data.update(values)
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, expires) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data), time.time() + self.ttl),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        self._writes += 1
+        if self._writes % self.purge_interval == 0:
+            connection.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def clear(self, session_id):
+        self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+# Add other shared backends (for example Redis) here, they only need 'load', 'update' and 'clear'.
+session_backends = {
+    "memory": MemoryBackend,
+    "sqlite": SQLiteBackend,
+}
+
+# -------- SESSION STORE -------- #
+
+
+def current_session_id():
+    # The id is created within 'before_request' (see 'install'), so it also exists for the very first request.
+    session_id = getattr(flask.g, "session_id", None)
+    if session_id is None:
+        session_id = flask.request.cookies.get(SESSION_COOKIE_NAME)
+    return session_id
+
+
+class SessionStore:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key, default=None):
+        return self.backend.load(current_session_id()).get(key, default)
+
+    def get_all(self):
+        return self.backend.load(current_session_id())
+
+    def set(self, key, value):
+        self.backend.update(current_session_id(), {key: value})
+
+    def update(self, values):
+        self.backend.update(current_session_id(), values)
+
+    def clear(self):
+        self.backend.clear(current_session_id())
+
+    def install(self, server):
+        # Give every browser its own session id, this cookie is sent with all the callback requests of 'Dash'.
+        @server.before_request
+        def assign_session_id():
+            session_id = flask.request.cookies.get(SESSION_COOKIE_NAME)
+            flask.g.new_session = session_id is None
+            flask.g.session_id = session_id or secrets.token_urlsafe(16)
+
+        @server.after_request
+        def store_session_cookie(response):
+            if getattr(flask.g, "new_session", False):
+                response.set_cookie(SESSION_COOKIE_NAME, flask.g.session_id, httponly=True, samesite="Lax")
+            return response
+
+
+def create_session_store(backend_name=SESSION_BACKEND):
+    if backend_name not in session_backends:
+        raise ValueError("Unknown session backend '{}', choose one of: {}.".format(backend_name, ", ".join(session_backends)))
+    return SessionStore(session_backends[backend_name]())
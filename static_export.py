@@ -0,0 +1,187 @@
+# Information:
+# Export of the static pages (see 'is_static' within 'pages.py': no widget, no button that a callback enables) to plain HTML
+# files, with the same header, footer and classes of 'style.css' as the application. Most page views are on these pages, a
+# file server answers them without Python. The interactive pages (the questions, the marble game, the result chart and the
+# code editors) stay within 'Dash': their links point to the application ('--app-url', the same host by default).
+#
+# Export the pages, run from the root of the repository:
+#   python3 static_export.py [--output static_site] [--app-url https://...]
+# Every page is written to '<path>/index.html' ('/' to 'index.html'), together with the stylesheets, the images and the
+# favicon it uses. Serve the folder in front of the application, for instance with nginx:
+#   location / { try_files $uri $uri/index.html @dash; }
+# and run the application with 'STATIC_SITE=1', so its links to static pages leave 'Dash' as well. The application then keeps
+# the answers of a walk within the session storage of the tab, the exported '/' removes them for the next student.
+
+import argparse
+import os
+import shutil
+from html import escape
+
+import dash
+
+from pages import compile_page
+
+DEFAULT_OUTPUT = "static_site"
+
+# The stores of 'main.py' within the session storage with 'STATIC_SITE=1' ('Dash' adds a key with the time of a change).
+WALK_STORES = ["adaptive_answers"]
+
+# Properties of the 'Dash' components that are HTML attributes.
+attribute_names = {"id": "id", "className": "class", "src": "src", "width": "width", "height": "height", "alt": "alt"}
+void_tags = {"img", "br", "hr"}
+
+HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<link rel="icon" type="image/x-icon" href="/_favicon.ico">
+{stylesheets}
+{scripts}
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# -------- RENDERING -------- #
+
+
+def as_list(children):
+    return children if isinstance(children, (list, tuple)) else [children]
+
+
+def render(component, link_href, content=None):
+    # HTML of a layout. 'link_href' gives the target of every link, 'content' is put within the component with that id.
+    if component is None:
+        return ""
+    if isinstance(component, (list, tuple)):
+        return "".join(render(child, link_href, content) for child in component)
+    if isinstance(component, (str, int, float)):
+        return escape(str(component))
+
+    layout = component.to_plotly_json()
+    props = layout["props"]
+    children = props.get("children")
+    if content and props.get("id") in content:
+        children = content[props["id"]]
+
+    match layout["namespace"], layout["type"]:
+        case "dash_core_components", "Link":
+            tag = "a"
+            attributes = [("href", link_href(props["href"], props.get("id")))]
+        case "dash_html_components", "P" if any(hasattr(child, "to_plotly_json") for child in as_list(children)):
+            tag = "div"  # React nests paragraphs, a browser closes the outer '<p>' before an inner one.
+            attributes = []
+        case "dash_html_components", name:
+            tag = name.lower()
+            attributes = []
+        case _:
+            return ""  # Stores, the location and the other components that only exist within 'Dash'.
+
+    attributes += [(attribute_names[name], value) for name, value in props.items() if name in attribute_names]
+    opening = "<{}{}>".format(tag, "".join(' {}="{}"'.format(name, escape(str(value))) for name, value in attributes))
+    if tag in void_tags:
+        return opening
+    return "{}{}</{}>".format(opening, render(children, link_href, content), tag)
+
+
+def image_sources(component, found=None):
+    # The 'src' of every image within a layout.
+    found = [] if found is None else found
+    if isinstance(component, (list, tuple)):
+        for child in component:
+            image_sources(child, found)
+    elif hasattr(component, "to_plotly_json"):
+        source = getattr(component, "src", None)
+        if isinstance(source, str):
+            found.append(source)
+        image_sources(getattr(component, "children", None), found)
+    return found
+
+
+def stylesheets(app):
+    # The external stylesheets of the application, and the stylesheets within the assets folder (in the order of 'Dash').
+    links = [sheet if isinstance(sheet, dict) else {"href": sheet, "rel": "stylesheet"} for sheet in app.config.external_stylesheets]
+    for folder, directories, files in sorted(os.walk(app.config.assets_folder)):
+        for name in sorted(files):
+            if name.endswith(".css"):
+                path = os.path.relpath(os.path.join(folder, name), app.config.assets_folder).replace(os.sep, "/")
+                links.append({"href": app.get_asset_url(path), "rel": "stylesheet"})
+    return links
+
+
+# -------- EXPORT -------- #
+
+
+def copy_asset(app, url, output):
+    # An asset URL ('/assets/...', without the query of 'Dash') to the same path within the output folder.
+    prefix = "{}{}/".format(app.config.requests_pathname_prefix, app.config.assets_url_path.strip("/"))
+    path = url.split("?", 1)[0]
+    if not path.startswith(prefix):
+        return None
+    target = os.path.join(output, path.lstrip("/"))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(os.path.join(app.config.assets_folder, path[len(prefix):]), target)
+    return path
+
+
+def export(app, page_registry, output=DEFAULT_OUTPUT, app_url="", link_target=None):
+    # Writes every static page, returns the exported paths. 'link_target' gives the target of a link that a callback
+    # chooses (a link with an "id"), the "href" of 'pages.json' when it isn't given.
+    static_paths = page_registry.static_paths()
+
+    def link_href(href, link_id):
+        if link_id is not None and link_target is not None:
+            href = link_target(href, link_id)
+        return href if href in static_paths else app_url + href
+
+    os.makedirs(output, exist_ok=True)
+    sheets = stylesheets(app)
+    for sheet in sheets:
+        sheet["href"] = copy_asset(app, sheet["href"], output) or sheet["href"]
+    head = "\n".join('<link rel="{}" href="{}">'.format(escape(sheet["rel"]), escape(sheet["href"])) for sheet in sheets)
+
+    favicon = os.path.join(app.config.assets_folder, "favicon.ico")
+    if not os.path.exists(favicon):
+        favicon = os.path.join(os.path.dirname(dash.__file__), "favicon.ico")  # The default icon of 'Dash'.
+    shutil.copyfile(favicon, os.path.join(output, "_favicon.ico"))
+
+    for path in static_paths:
+        # Compiled without the links of 'STATIC_SITE', 'link_href' chooses the targets here.
+        page = compile_page(page_registry.content(path), page_registry.widgets, page_registry.asset_url)
+        for source in image_sources(page):
+            copy_asset(app, source, output)
+
+        body = render(app.layout, link_href, {"container": page})
+        scripts = ""
+        if path == "/":
+            # A new student starts here, without the answers of the previous walk within this tab.
+            keys = [key for store in WALK_STORES for key in (store, store + "-timestamp")]
+            scripts = "<script>{}</script>".format("".join('sessionStorage.removeItem("{}");'.format(key) for key in keys))
+        folder = os.path.join(output, path.strip("/"))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "index.html"), "w", encoding="utf-8") as page_file:
+            page_file.write(HTML_PAGE.format(title=escape(app.title), stylesheets=head, scripts=scripts, body=body))
+    return static_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the static pages to plain HTML files.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Folder of the exported pages.")
+    parser.add_argument("--app-url", default="", help="Host of the application, for the links to interactive pages.")
+    arguments = parser.parse_args()
+
+    import main  # The application itself, for its root layout, its pages and its assets.
+
+    def link_target(href, link_id):
+        # The target 'choose_next_page' gives a new student (a static page has no answers).
+        return main.next_page({}) if main.QUESTION_ORDER == "adaptive" else href
+
+    exported = export(main.app, main.page_registry, arguments.output, arguments.app_url, link_target)
+    for path in exported:
+        print("{:<12} {}".format(path, os.path.join(arguments.output, path.strip("/"), "index.html")))
+    print("{} static pages, the other pages stay within the application: {}".format(
+        len(exported), ", ".join(path for path in main.page_registry.paths() if path not in exported)))
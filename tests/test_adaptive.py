@@ -0,0 +1,202 @@
+# Information:
+# Walks the adaptive questionnaire (see 'adaptive.py') the way the browser does: the clientside callbacks of
+# 'assets/clientside.js' run within node, and a callback is only called when all its inputs are on the page that's shown
+# (the rule of 'dash-renderer'). Run from the root of the repository:
+#   python3 -m pytest tests
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+os.environ["QUESTION_ORDER"] = "adaptive"
+os.environ["EVENTS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from callback_analyzer import component_ids  # noqa: E402
+
+CLIENTSIDE_FILE = os.path.join(os.path.dirname(main.__file__), "assets", "clientside.js")
+NO_UPDATE = "__no_update__"
+
+# Runs one function of 'window.dash_clientside.saxion' with the arguments and the triggered input of stdin.
+NODE_DRIVER = """
+var fs = require("fs");
+var vm = require("vm");
+var call = JSON.parse(fs.readFileSync(0, "utf-8"));
+var ignore = function () {};
+var window = {
+    dash_clientside: {no_update: "%s", callback_context: {triggered: [{prop_id: call.triggered, value: null}]}},
+    addEventListener: ignore, setTimeout: ignore, clearTimeout: ignore, requestAnimationFrame: ignore,
+};
+var context = vm.createContext({window: window, document: {addEventListener: ignore}, navigator: {}, console: console});
+vm.runInContext(fs.readFileSync(process.argv[1], "utf-8"), context);
+var result = context.window.dash_clientside.saxion[call.function].apply(null, call.arguments);
+process.stdout.write(JSON.stringify(result === undefined ? null : result));
+""" % NO_UPDATE
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node runs the clientside callbacks")
+
+
+def run_clientside(function_name, arguments, triggered=""):
+    call = json.dumps({"function": function_name, "arguments": arguments, "triggered": triggered})
+    output = subprocess.run(["node", "-e", NODE_DRIVER, CLIENTSIDE_FILE], input=call, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def find_component(component, component_id):
+    if isinstance(component, (list, tuple)):
+        for child in component:
+            found = find_component(child, component_id)
+            if found is not None:
+                return found
+    elif hasattr(component, "to_plotly_json"):
+        if getattr(component, "id", None) == component_id:
+            return component
+        return find_component(getattr(component, "children", None), component_id)
+    return None
+
+
+class Browser:
+    # The properties of the components on the screen, changed by the clientside callbacks only.
+    def __init__(self):
+        self.policy = find_component(main.app.layout, "adaptive_policy").data
+        self.answers = find_component(main.app.layout, "adaptive_answers").data
+        self.pathname = None
+        self.page = None
+
+    def shown_ids(self):
+        return component_ids(main.app.layout) | component_ids(self.page)
+
+    def callbacks(self, input_name):
+        # The clientside callbacks that 'dash-renderer' calls when the input changes on this page.
+        shown = self.shown_ids()
+        for callback in main.app._callback_list:
+            names = ["{}.{}".format(item["id"], item["property"]) for item in callback["inputs"]]
+            if callback.get("clientside_function") and input_name in names and \
+                    all(item["id"] in shown for item in callback["inputs"] + callback["state"]):
+                yield callback
+
+    def value(self, item):
+        if item["id"] == "adaptive_answers":
+            return self.answers
+        if item["id"] == "adaptive_policy":
+            return self.policy
+        if item["id"] == "url":
+            return self.pathname
+        return getattr(find_component(self.page, item["id"]), item["property"], None)
+
+    def change(self, input_name, value):
+        for callback in list(self.callbacks(input_name)):
+            if callback["output"].split("@")[0] != "adaptive_answers.data":
+                continue
+            arguments = [value if "{}.{}".format(item["id"], item["property"]) == input_name else self.value(item)
+                         for item in callback["inputs"] + callback["state"]]
+            result = run_clientside(callback["clientside_function"]["function_name"], arguments, input_name)
+            if result != NO_UPDATE:
+                self.answers = result
+
+    def navigate(self, pathname):
+        self.pathname = pathname
+        self.page = main.page_registry.layout(pathname)
+        self.change("url.pathname", pathname)
+
+    def next_page(self):
+        return run_clientside("choose_next_page", [self.answers, self.policy])
+
+
+def test_every_question_page_remembers_its_answer():
+    browser = Browser()
+    for key, pathname in main.question_pages.items():
+        if key.startswith("marble_"):
+            continue  # The marble game keeps its answers itself.
+        browser.navigate(pathname)
+        widget = next(component_id for component_id in browser.shown_ids() if component_id.startswith("initial_"))
+        assert list(browser.callbacks("{}.value".format(widget))), "no answer is kept on {}".format(pathname)
+
+
+def test_adaptive_path_reaches_the_result():
+    browser = Browser()
+    browser.navigate("/")
+    pathname = browser.next_page()
+    assert pathname == main.next_page({})
+
+    marble_options = {question["key"]: question["left"][0] for question in main.marble_questions}
+    visited = []
+    while pathname != main.result_page:
+        assert pathname not in visited, "the questionnaire is stuck on {}".format(pathname)
+        visited.append(pathname)
+        browser.navigate(pathname)
+        if main.questionnaire.next_question(browser.answers) in marble_options:
+            # The game asks its questions one after the other and sets the answers itself (see 'start_marble_game'),
+            # every marble lands within the left bin.
+            while main.questionnaire.next_question(browser.answers) in marble_options:
+                key = main.questionnaire.next_question(browser.answers)
+                browser.answers = dict(browser.answers, **{key: marble_options[key]})
+        else:
+            # The last option, "No preference" for the study leaves the most questions.
+            widget = next(component_id for component_id in browser.shown_ids() if component_id.startswith("initial_"))
+            options = find_component(browser.page, widget).options
+            browser.change("{}.value".format(widget), options[-1]["value"])
+            assert pathname in [main.question_pages[key] for key in browser.answers]
+        pathname = browser.next_page()
+        assert pathname == main.next_page(browser.answers)  # The same choice as the server.
+
+    assert len(visited) > 1
+    browser.navigate("/")
+    assert browser.answers == {}  # A new student.
+
+
+# -------- TWO WALKS IN ONE BROWSER -------- #
+
+# The widget of every question that isn't part of the marble game.
+question_inputs = {"initial_high_school_choice": "initial_high_school_filter", "initial_study_choice": "initial_study_filter",
+                   "initial_interest_choice": "initial_interest_filter"}
+
+
+def post_callback(client, output, callback, values):
+    # A server callback as the browser sends it, 'values' has the value of every input and state by id.
+    outputs = [dict(zip(("id", "property"), item.rsplit(".", 1))) for item in output.strip(".").split("...")]
+    response = client.post("/_dash-update-component", json={
+        "output": output,
+        "outputs": outputs if len(outputs) > 1 else outputs[0],
+        "inputs": [dict(item, value=values.get(item["id"])) for item in callback["inputs"]],
+        "state": [dict(item, value=values.get(item["id"])) for item in callback["state"]],
+        "changedPropIds": ["{}.{}".format(item["id"], item["property"]) for item in callback["inputs"]],
+    })
+    assert response.status_code in (200, 204)
+    return response.get_json() if response.status_code == 200 else None
+
+
+def server_walk(client, answers):
+    # Every server callback a walk with these answers sends: the questions, the marble game and the result page.
+    callbacks = {getattr(callback.get("callback"), "__name__", None): (output, callback) for output, callback in main.app.callback_map.items()}
+    values = {"adaptive_answers": answers}
+    for key, widget in question_inputs.items():
+        if key in answers:
+            for output, callback in main.app.callback_map.items():
+                if callback.get("callback") is not None and [item["id"] for item in callback["inputs"]] == [widget]:
+                    post_callback(client, output, callback, dict(values, **{widget: answers[key]}))
+
+    marble_answers = {key: value for key, value in answers.items() if key.startswith("marble_")}
+    next_pathname = post_callback(client, *callbacks["submit_marble_answers"], dict(values, marble_answers=marble_answers))
+    chart = post_callback(client, *callbacks["show_chart"], dict(values, url=main.result_page))
+    return next_pathname["response"]["url"]["pathname"], chart["response"]["graph_container"]["children"]["props"]["children"]["props"]["id"]
+
+
+def test_second_walk_is_scored_on_its_own_answers():
+    client = main.server_run.test_client()  # One browser, so one session.
+    options = dict(main.questions)
+    first = {key: values[0] for key, values in options.items() if key in question_inputs or key.startswith("marble_")}
+    server_walk(client, first)
+
+    # The next student answers fewer questions, the adaptive questionnaire skips the others.
+    second = {"initial_study_choice": options["initial_study_choice"][-1]}
+    second.update({key: options[key][-1] for key in options if key.startswith("marble_")})
+    pathname, chart_id = server_walk(client, second)
+    scores = [int(round(score)) for score in main.scoring_engine.score(second)]
+    assert pathname == main.next_page(second)
+    assert chart_id == "Graph_{}".format("_".join(str(score) for score in scores))
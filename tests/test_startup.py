@@ -0,0 +1,22 @@
+# Information:
+# The first-request numbers of '/_startup' (see 'warm_up' within 'main.py') cover the responses that the layout cache and
+# the HTTP cache answer before 'Dash'. Run from the root of the repository:
+#   python3 -m pytest tests
+
+import os
+import sys
+
+os.environ["EVENTS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def test_cached_responses_are_measured():
+    client = main.server_run.test_client()
+    for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+        assert client.get(path).status_code == 200
+
+    first_requests = client.get("/_startup").get_json()["first_requests"]
+    for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+        assert path in first_requests